@@ -0,0 +1,300 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+from db import LOG_COLUMNS, LOG_DTYPES, PoolError, QueryError, Watermark, execute_recorded, get_pool, run_query
+from telemetry import query_label
+
+# Optional columnar engine for the Advanced Insights queries.
+# A Parquet snapshot of Police_Post_Logs, partitioned by stop year, is built
+# from the live table in primary-key chunks and topped up with new rows
+# periodically. Heavy group-by/window queries can then run on embedded DuckDB
+# against the snapshot instead of competing with inserts on MySQL.
+# Needs the duckdb package; without it every query runs on MySQL.
+# The dashboard never builds the snapshot inside a query: a missing, stale
+# or mismatched snapshot is built in the background, and queries run on
+# MySQL until it is usable.
+#
+#   python analytics.py refresh          add rows inserted since the last refresh
+#   python analytics.py refresh --full   rebuild the snapshot from scratch
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+SNAPSHOT_DIR = os.environ.get("SECURECHECK_SNAPSHOT_DIR", "snapshot")
+MANIFEST = "_manifest.json"
+EXPORT_CHUNK = 200000        # rows read from the live table per primary-key range
+REFRESH_SECONDS = 900        # snapshot age after which a snapshot query starts a background top-up
+
+# query_map entries that run on the snapshot by default
+SNAPSHOT_QUERIES = {
+    "Gender Distribution of Drivers stopped in each Country",
+    "What is the arrest rate by country and violation",
+    "Yearly Breakdown of Stops and Arrests by Country ",
+    "Driver Violation Trends Based on Age and Race",
+    "Number of Stops by Year,Month, Hour of the Day",
+    "Violations with High Search and Arrest Rates",
+    "Driver Demographics by Country (Age, Gender, and Race)",
+}
+
+# MySQL-specific queries DuckDB cannot run as written (avg over a text column)
+MYSQL_ONLY_QUERIES = {
+    "Average stop duration for different violations",
+}
+
+# Typed snapshot columns; the year partition column is derived from stop_date
+SNAPSHOT_SELECT = """select cast(id as BIGINT) as id,
+                     cast(stop_date as DATE) as stop_date,
+                     try_cast(stop_time as TIME) as stop_time,
+                     country_name, driver_gender,
+                     cast(driver_age as INTEGER) as driver_age,
+                     driver_race, violation,
+                     cast(search_conducted as INTEGER) as search_conducted,
+                     search_type, stop_outcome,
+                     cast(is_arrested as INTEGER) as is_arrested,
+                     stop_duration,
+                     cast(drugs_related_stop as INTEGER) as drugs_related_stop,
+                     vehicle_number,
+                     coalesce(year(cast(stop_date as DATE)), 0) as stop_year
+                     from chunk"""
+
+_refresh_lock = threading.Lock()
+_background = None      # thread running a dashboard-started refresh
+_background_lock = threading.Lock()
+
+
+def available():
+    return duckdb is not None
+
+
+def _require_duckdb():
+    if duckdb is None:
+        raise QueryError("The columnar snapshot needs the duckdb package (pip install duckdb)")
+
+
+def read_manifest(path=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {"last_id": 0, "rows": 0, "refreshed_at": None}
+
+
+def _write_manifest(path, manifest):
+    temp = os.path.join(path, MANIFEST + ".tmp")
+    with open(temp, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+    os.replace(temp, os.path.join(path, MANIFEST))
+
+
+# Driver values in forms DuckDB can cast: MySQL TIME arrives as a timedelta
+def _prepare_chunk(chunk):
+    chunk = chunk.copy()
+    chunk["stop_date"] = pd.to_datetime(chunk["stop_date"], errors="coerce")
+    if pd.api.types.is_timedelta64_dtype(chunk["stop_time"]):
+        chunk["stop_time"] = (pd.Timestamp(0) + chunk["stop_time"]).dt.strftime("%H:%M:%S")
+    else:
+        chunk["stop_time"] = chunk["stop_time"].astype("string")
+    for column in ("driver_age", "search_conducted", "is_arrested", "drugs_related_stop"):
+        chunk[column] = pd.to_numeric(chunk[column], errors="coerce")
+    return chunk
+
+
+# Copy live rows above the manifest's last id into the snapshot, one
+# primary-key range at a time, recording progress after every range
+def _export(path, manifest, progress):
+    p = get_pool().placeholder
+    columns = ", ".join(["id"] + LOG_COLUMNS)
+    connection = duckdb.connect()
+    try:
+        while True:
+            after_id = manifest["last_id"]
+            watermark = Watermark(after_id)
+            new_rows, params = watermark.where(p)
+            chunk = run_query(f"select {columns} from Police_Post_Logs where {new_rows} order by id limit {EXPORT_CHUNK}",
+                              params, LOG_DTYPES)
+            if chunk.empty:
+                break
+            # Files left by an attempt at this range that stopped before the
+            # manifest was written would otherwise be read twice
+            for stale in glob.glob(os.path.join(path, "**", f"part_{after_id + 1}_*.parquet"), recursive=True):
+                os.remove(stale)
+            connection.register("chunk", _prepare_chunk(chunk))
+            connection.execute(f"""copy ({SNAPSHOT_SELECT}) to '{path}'
+                                   (format parquet, partition_by (stop_year), append,
+                                    filename_pattern 'part_{after_id + 1}_{{uuid}}')""")
+            connection.unregister("chunk")
+            watermark.advance(chunk["id"].max())
+            manifest["last_id"] = watermark.last_id
+            manifest["rows"] += len(chunk)
+            _write_manifest(path, manifest)
+            progress(f"{manifest['rows']} rows in the snapshot")
+    except duckdb.Error as e:
+        raise QueryError(str(e)) from e
+    finally:
+        connection.close()
+
+
+# Whether the live rows up to the manifest's last id are still the ones
+# exported. A recreated or truncated table fails this, and appending to
+# the snapshot would then keep serving the old rows.
+def _matches_live(manifest):
+    p = get_pool().placeholder
+    live = run_query(f"select count(*) as row_count, max(id) as max_id from Police_Post_Logs where id <= {p}",
+                     (manifest["last_id"],))
+    row_count, max_id = live.iloc[0]
+    if manifest["rows"] == 0:
+        return row_count == 0
+    return row_count == manifest["rows"] and max_id == manifest["last_id"]
+
+
+# Top the snapshot up with new rows, or rebuild it with full=True.
+# A snapshot that no longer matches the live table is rebuilt as well.
+# A full rebuild is written next to the old snapshot and swapped in when done.
+def refresh_snapshot(path=SNAPSHOT_DIR, full=False, progress=print):
+    _require_duckdb()
+    with _refresh_lock:
+        started = time.perf_counter()
+        if not full and os.path.isdir(path) and not _matches_live(read_manifest(path)):
+            progress("The live table no longer matches the snapshot; rebuilding it")
+            full = True
+        target = path + ".building" if full or not os.path.isdir(path) else path
+        if target != path:
+            shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(target, exist_ok=True)
+        manifest = read_manifest(target)
+        _export(target, manifest, progress)
+        manifest["refreshed_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+        _write_manifest(target, manifest)
+        if target != path:
+            old = path + ".old"
+            shutil.rmtree(old, ignore_errors=True)
+            if os.path.isdir(path):
+                os.replace(path, old)
+            os.replace(target, path)
+            shutil.rmtree(old, ignore_errors=True)
+        manifest["seconds"] = round(time.perf_counter() - started, 3)
+        return manifest
+
+
+def snapshot_age(path=SNAPSHOT_DIR):
+    refreshed_at = read_manifest(path)["refreshed_at"]
+    if refreshed_at is None:
+        return None
+    return (datetime.datetime.now() - datetime.datetime.fromisoformat(refreshed_at)).total_seconds()
+
+
+# Start a refresh on a background thread unless one is already running
+def refresh_in_background(path=SNAPSHOT_DIR, full=False):
+    global _background
+    with _background_lock:
+        if _background is not None and _background.is_alive():
+            return False
+        _background = threading.Thread(target=_refresh_quietly, args=(path, full),
+                                       name="securecheck-snapshot", daemon=True)
+        _background.start()
+        return True
+
+
+def _refresh_quietly(path, full):
+    try:
+        refresh_snapshot(path, full, progress=lambda message: None)
+    except Exception:
+        pass   # the next query retries; until then queries stay on MySQL
+
+
+# Whether snapshot queries can run now. A snapshot that is missing, behind
+# a table that was truncated or recreated, or older than `max_age` gets a
+# background refresh; only the first two mean "run on MySQL meanwhile".
+def snapshot_ready(path=SNAPSHOT_DIR, max_age=REFRESH_SECONDS):
+    if not available():
+        return False
+    manifest = read_manifest(path)
+    age = snapshot_age(path)
+    if age is None:
+        refresh_in_background(path)
+        return False
+    try:
+        latest_id = run_query("select max(id) as latest_id from Police_Post_Logs").iloc[0, 0]
+    except (PoolError, QueryError):
+        return manifest["rows"] > 0   # the live table cannot be checked, let alone queried
+    if manifest["rows"] and (pd.isna(latest_id) or latest_id < manifest["last_id"]):
+        refresh_in_background(path, full=True)
+        return False
+    if age > max_age:
+        refresh_in_background(path)
+    return manifest["rows"] > 0
+
+
+# Snapshot files whose rows the manifest records; a file an unfinished
+# export is still writing starts above the manifest's last id
+def _snapshot_files(path, manifest):
+    files = []
+    for name in glob.glob(os.path.join(path, "**", "part_*.parquet"), recursive=True):
+        first_id = int(os.path.basename(name).split("_")[1])
+        if first_id <= manifest["last_id"]:
+            files.append(name.replace(os.sep, "/"))
+    return files
+
+
+# Run a query against the snapshot; the table name Police_Post_Logs is a view
+# over the Parquet files, so query_map SQL runs as written. NULLs sort the
+# way MySQL sorts them, and integer sums (HUGEINT in DuckDB) come back as
+# integers rather than floats, so results match the live engine.
+# Callers check snapshot_ready() first; this never builds the snapshot itself.
+def run_snapshot_query(query, path=SNAPSHOT_DIR):
+    _require_duckdb()
+    files = _snapshot_files(path, read_manifest(path))
+    if not files:
+        raise QueryError("The analytics snapshot has not been built yet")
+    connection = duckdb.connect()
+    try:
+        connection.execute("set default_null_order = 'nulls_first_on_asc_last_on_desc'")
+        connection.execute(f"""create view Police_Post_Logs as
+                               select * from read_parquet({files!r}, hive_partitioning = true)""")
+
+        def execute():
+            relation = connection.sql(query)
+            columns = [f'cast("{name}" as BIGINT) as "{name}"' if str(kind) == "HUGEINT" else f'"{name}"'
+                       for name, kind in zip(relation.columns, relation.types)]
+            return relation.project(", ".join(columns)).df()
+
+        return execute_recorded("snapshot: " + query_label(query), execute)
+    except duckdb.Error as e:
+        raise QueryError(str(e)) from e
+    finally:
+        connection.close()
+
+
+# Engines offered for a query_map entry, default first
+def engines_for(name):
+    if not available() or name in MYSQL_ONLY_QUERIES:
+        return ["MySQL (live)"]
+    if name in SNAPSHOT_QUERIES:
+        return ["Columnar snapshot", "MySQL (live)"]
+    return ["MySQL (live)", "Columnar snapshot"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parquet snapshot of Police_Post_Logs for the analytics engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+    refresh = commands.add_parser("refresh", help="copy new rows into the snapshot")
+    refresh.add_argument("--full", action="store_true", help="rebuild the snapshot from scratch")
+    refresh.add_argument("--path", default=SNAPSHOT_DIR)
+    args = parser.parse_args(argv)
+    manifest = refresh_snapshot(args.path, full=args.full)
+    print(f"Snapshot at {args.path}: {manifest['rows']} rows up to id {manifest['last_id']} "
+          f"({manifest['seconds']}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as WaitTimeout
+
+from cache import tracked_fetch
+from db import PoolError, QueryError, execute_recorded, get_pool, read_frame, translate_sql
+from telemetry import query_label
+
+# Non-blocking query execution for the dashboard.
+# Queries run on a bounded worker pool with a deadline each. A query that
+# runs past its deadline or is cancelled is stopped on the server
+# (KILL QUERY on MySQL, interrupt() on SQLite), not just abandoned.
+# Independent queries submitted together run concurrently, so a page waits
+# for the slowest of them instead of their sum.
+
+WORKERS = 8               # queries running at once across all sessions
+DEFAULT_TIMEOUT = 30      # seconds
+
+
+class QueryTimeout(QueryError):
+    pass
+
+
+class QueryCancelled(QueryError):
+    pass
+
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="securecheck-query")
+
+
+# Stop a running statement from another connection. The kill gets a connection
+# of its own rather than waiting for a pooled one, since a busy pool is when
+# queries need stopping; if even that fails the server-side
+# max_execution_time still ends the statement.
+def kill_query(connection_id):
+    pool = get_pool()
+    try:
+        with pool.dedicated_connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(f"kill query {int(connection_id)}")
+            finally:
+                cursor.close()
+    except PoolError:
+        pass
+    except pool.errors:
+        pass   # the statement finished before the kill arrived
+
+
+class QueryHandle:
+
+    def __init__(self, label, timeout):
+        self.label = label
+        self.timeout = timeout
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout
+        self.future = None
+        self.status = "queued"
+        self._interrupt = None     # set while a statement is running on the server
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def done(self):
+        return self.future.done()
+
+    # Called by the worker as it starts; False if the query was stopped while queued
+    def _begin(self):
+        with self._lock:
+            if self.status != "queued":
+                return False
+            self.status = "running"
+            return True
+
+    # The interrupt is only ever sent while holding the lock, and the worker
+    # clears it (taking the lock) before the connection goes back to the pool,
+    # so a kill can never reach another session's query on a reused connection.
+    # Sending it never waits for the pool (see kill_query).
+    def _set_interrupt(self, interrupt):
+        with self._lock:
+            self._interrupt = interrupt
+            if interrupt is not None and self.status in ("cancelled", "timed out"):
+                interrupt()
+
+    def _stop(self, status):
+        with self._lock:
+            if self.future.done():
+                return
+            self.status = status
+            self.future.cancel()
+            if self._interrupt is not None:
+                self._interrupt()
+
+    def cancel(self):
+        self._stop("cancelled")
+
+    # Wait up to `timeout` seconds (or the deadline); True once the query has finished.
+    # Past the deadline the query is stopped.
+    def wait(self, timeout=None):
+        remaining = self.deadline - time.monotonic()
+        if timeout is not None:
+            remaining = min(remaining, timeout)
+        try:
+            self.future.exception(timeout=max(remaining, 0))
+        except CancelledError:
+            return True
+        except WaitTimeout:
+            if time.monotonic() >= self.deadline:
+                self._stop("timed out")
+            return False
+        return True
+
+    def result(self):
+        while not self.wait():
+            if self.status == "timed out":
+                break
+        if self.status == "timed out":
+            raise QueryTimeout(f"{self.label} did not finish within {self.timeout}s")
+        if self.status == "cancelled":
+            raise QueryCancelled(f"{self.label} was cancelled")
+        try:
+            return self.future.result(timeout=0)
+        except CancelledError:
+            raise QueryCancelled(f"{self.label} was cancelled") from None
+
+
+# Run one statement on a pooled connection, registering how to interrupt it
+def _run_interruptible(handle, sql, params):
+    return execute_recorded(handle.label, lambda: _execute_interruptible(handle, sql, params))
+
+
+def _execute_interruptible(handle, sql, params):
+    pool = get_pool()
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            if pool.dialect == "mysql":
+                cursor.execute("select connection_id()")
+                (connection_id,), = cursor.fetchall()
+                # Server-side deadline as a backstop if the kill cannot be sent
+                remaining_ms = max(int((handle.deadline - time.monotonic()) * 1000), 1)
+                cursor.execute(f"set session max_execution_time = {remaining_ms}")
+                handle._set_interrupt(lambda: kill_query(connection_id))
+            else:
+                handle._set_interrupt(connection.interrupt)
+            cursor.execute(translate_sql(sql, pool.dialect), params or ())
+            return read_frame(cursor)
+        except pool.errors as e:
+            if handle.status in ("cancelled", "timed out"):
+                raise QueryCancelled(f"{handle.label} was {handle.status}") from e
+            raise QueryError(str(e)) from e
+        finally:
+            handle._set_interrupt(None)
+            if pool.dialect == "mysql":
+                try:
+                    cursor.execute("set session max_execution_time = 0")
+                except pool.errors:
+                    pass
+            cursor.close()
+
+
+def _start(handle, fn, *args):
+    def run():
+        if not handle._begin():
+            raise QueryCancelled(f"{handle.label} was {handle.status}")
+        try:
+            return fn(*args)
+        finally:
+            with handle._lock:
+                if handle.status == "running":
+                    handle.status = "done"
+
+    handle.future = _executor.submit(run)
+    return handle
+
+
+# Run a SQL query in the background, through the result cache (ttl=0 skips it)
+def submit(sql, params=None, timeout=DEFAULT_TIMEOUT, ttl=None, label=None):
+    handle = QueryHandle(label or query_label(sql), timeout)
+
+    def loader(sql, params):
+        return _run_interruptible(handle, sql, params)
+
+    return _start(handle, tracked_fetch, sql, params, loader, ttl, handle.label)
+
+
+# Run any data-access function in the background (it cannot be killed on the server)
+def submit_call(fn, *args, timeout=DEFAULT_TIMEOUT, label=None):
+    return _start(QueryHandle(label or fn.__name__, timeout), fn, *args)
+
+
+# Results for a dict of handles, waiting for all of them together.
+# Failures come back as the exception instead of a result.
+def gather(handles):
+    results = {}
+    for name, handle in handles.items():
+        try:
+            results[name] = handle.result()
+        except Exception as e:
+            results[name] = e
+    return results
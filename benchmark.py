@@ -0,0 +1,361 @@
+import argparse
+import datetime
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from db import (DB_CONFIG, LOG_COLUMNS, LOG_DTYPES, get_pool, insert_sql, mysql_pool, read_frame, run_query, set_pool,
+                sqlite_pool, translate_sql)
+from ingest import db_values
+from ledger import fetch_page
+from metrics import AGGREGATE_SQL, SUMMARY_TABLE, quick_metrics
+from predict import KEY_COLUMNS, PredictionIndex, predict_frame
+from queries import query_map
+
+# Query execution time benchmark.
+# Loads synthetic Police_Post_Logs data at a chosen scale, then times every
+# View Logs query plus the Quick Metrics and Predict paths and writes p50/p95
+# latency, rows returned, rows scanned (MySQL only) and peak Python memory as JSON,
+# along with the ledger's in-memory size as plain objects versus typed columns
+# and the time the plotting libraries take to import.
+#
+#   python benchmark.py --rows 1M --sqlite bench.db --output before.json
+#   python benchmark.py --rows 1M --sqlite bench.db --skip-load --output after.json --compare before.json
+#   python benchmark.py --rows 10k --mysql-database policeledger_bench
+#   python benchmark.py --rows 1M --skip-load --frame-memory 200k
+
+# Synthetic data distributions
+
+VIOLATIONS = {"Speeding": 0.56, "Moving violation": 0.19, "Equipment": 0.12, "Other": 0.06,
+              "Registration/plates": 0.04, "Seat belt": 0.03}
+COUNTRIES = {"USA": 0.45, "India": 0.35, "Canada": 0.20}
+GENDERS = {"M": 0.68, "F": 0.32}
+RACES = {"White": 0.62, "Black": 0.14, "Hispanic": 0.12, "Asian": 0.09, "Other": 0.03}
+OUTCOMES = {"Citation": 0.70, "Warning": 0.22, "Arrest Driver": 0.03, "Arrest Passenger": 0.01,
+            "No Action": 0.02, "N/D": 0.02}
+DURATIONS = {"0-15 Min": 0.72, "16-30 Min": 0.21, "30+ Min": 0.07}
+SEARCH_TYPES = {"Frisk": 0.40, "Vehicle Search": 0.45, "Incident to Arrest": 0.15}
+# Fewer stops overnight, peaks in the morning and evening commute
+HOUR_WEIGHTS = [2, 1, 1, 1, 1, 2, 4, 6, 7, 7, 6, 5, 5, 5, 5, 6, 7, 7, 6, 5, 4, 3, 3, 2]
+
+CHUNK_SIZE = 100000
+SCALES = {"k": 1000, "m": 1000000}
+
+SQLITE_TABLE = """create table Police_Post_Logs (
+                  id INTEGER PRIMARY KEY AUTOINCREMENT, stop_date TEXT, stop_time TEXT,
+                  country_name TEXT, driver_gender TEXT, driver_age INTEGER, driver_race TEXT,
+                  violation TEXT, search_conducted INTEGER, search_type TEXT, stop_outcome TEXT,
+                  is_arrested INTEGER, stop_duration TEXT, drugs_related_stop INTEGER, vehicle_number TEXT)"""
+
+# Same table as securecheck.ipynb
+MYSQL_TABLE = """create table Police_Post_Logs(
+                 id INT AUTO_INCREMENT PRIMARY KEY, stop_date DATE, stop_time TIME,
+                 country_name VARCHAR(50), driver_gender VARCHAR(10), driver_age_raw INT, driver_age INT,
+                 driver_race VARCHAR(50), violation_raw VARCHAR(100), violation VARCHAR(100),
+                 search_conducted BOOLEAN, search_type VARCHAR(100), stop_outcome VARCHAR(100),
+                 is_arrested BOOLEAN, stop_duration VARCHAR(50), drugs_related_stop BOOLEAN,
+                 vehicle_number VARCHAR(50))"""
+
+
+def parse_rows(text):
+    text = text.strip().lower().replace("_", "")
+    if text[-1] in SCALES:
+        return int(float(text[:-1]) * SCALES[text[-1]])
+    return int(text)
+
+
+def _choice(rng, weights, size):
+    p = np.array(list(weights.values()), dtype=float)
+    return rng.choice(list(weights), size=size, p=p / p.sum())
+
+
+# Synthetic ledger rows in chunks. Searches skew young and lead to more
+# arrests and drug stops; a few vehicles account for many stops.
+def generate_logs(rows, seed=0, chunk_size=CHUNK_SIZE):
+    rng = np.random.default_rng(seed)
+    plates = max(rows // 3, 1)
+    hour_p = np.array(HOUR_WEIGHTS, dtype=float) / sum(HOUR_WEIGHTS)
+    first_day = np.datetime64("2018-01-01")
+    for offset in range(0, rows, chunk_size):
+        n = min(chunk_size, rows - offset)
+        age = np.clip(rng.gamma(2.2, 8.0, n) + 16, 16, 90).astype(int)
+        search = rng.random(n) < 0.035 + 0.05 * (age < 25)
+        outcome = _choice(rng, OUTCOMES, n)
+        outcome = np.where(search & (rng.random(n) < 0.3), "Arrest Driver", outcome)
+        drugs = (rng.random(n) < 0.005) | (search & (rng.random(n) < 0.25))
+        seconds = rng.choice(24, n, p=hour_p) * 3600 + rng.integers(0, 3600, n)
+        plate = (rng.zipf(1.6, n) - 1 + rng.integers(0, plates, n)) % plates
+        yield pd.DataFrame({
+            "stop_date": pd.Series(first_day + rng.integers(0, 6 * 365, n).astype("timedelta64[D]")).dt.date,
+            "stop_time": pd.to_datetime(seconds, unit="s").time,
+            "country_name": _choice(rng, COUNTRIES, n),
+            "driver_gender": _choice(rng, GENDERS, n),
+            "driver_age": age,
+            "driver_race": _choice(rng, RACES, n),
+            "violation": _choice(rng, VIOLATIONS, n),
+            "search_conducted": search.astype(int),
+            "search_type": np.where(search, _choice(rng, SEARCH_TYPES, n), "none"),
+            "stop_outcome": outcome,
+            "is_arrested": np.char.startswith(outcome.astype(str), "Arrest").astype(int),
+            "stop_duration": _choice(rng, DURATIONS, n),
+            "drugs_related_stop": drugs.astype(int),
+            "vehicle_number": pd.Series(plate).astype(str).str.zfill(7).radd("TN"),
+        })[LOG_COLUMNS]
+
+
+# Recreate Police_Post_Logs and fill it with `rows` synthetic logs
+def load_synthetic(rows, seed=0, progress=print):
+    pool = get_pool()
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("drop table if exists Police_Post_Logs")
+            cursor.execute(f"drop table if exists {SUMMARY_TABLE}")
+            cursor.execute(SQLITE_TABLE if pool.dialect == "sqlite" else MYSQL_TABLE)
+            sql = insert_sql(pool.placeholder)
+            loaded = 0
+            started = time.perf_counter()
+            for chunk in generate_logs(rows, seed):
+                values = db_values(chunk, pool.dialect)
+                cursor.executemany(sql, list(values.itertuples(index=False, name=None)))
+                connection.commit()
+                loaded += len(chunk)
+                progress(f"{loaded} synthetic rows loaded ({loaded / (time.perf_counter() - started):,.0f} rows/sec)")
+        finally:
+            cursor.close()
+
+
+# Measurements
+
+def _handler_reads(cursor):
+    cursor.execute("show session status like 'Handler_read%'")
+    return sum(int(value) for _, value in cursor.fetchall())
+
+
+# Run one SQL statement the way the dashboard does (rows into a DataFrame).
+# On MySQL the session Handler_read_* counters give the rows the server read.
+def _run_sql(sql, params=()):
+    pool = get_pool()
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            scanned = None
+            if pool.dialect == "mysql":
+                first = _handler_reads(cursor)
+                before = _handler_reads(cursor)
+                overhead = before - first
+            cursor.execute(translate_sql(sql, pool.dialect), params)
+            data = read_frame(cursor)
+            if pool.dialect == "mysql":
+                scanned = _handler_reads(cursor) - before - overhead
+        finally:
+            cursor.close()
+    return len(data), scanned
+
+
+# Time `run` (which returns rows returned and rows scanned) `repeats` times after
+# one warm-up run, then once more under tracemalloc for peak Python memory
+def measure(run, repeats):
+    run()
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows, scanned = run()
+        latencies.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "mean_ms": round(float(np.mean(latencies)), 3),
+        "runs": repeats,
+        "rows_returned": rows,
+        "rows_scanned": scanned,
+        "peak_python_bytes": peak,
+    }
+
+
+def benchmark_paths(repeats=5, progress=print):
+    p = get_pool().placeholder
+    paths = {}
+    for name, query in query_map.items():
+        paths[f"query_map/{name.strip()}"] = lambda query=query: _run_sql(query)
+
+    paths["quick_metrics/sql_aggregate"] = lambda: _run_sql(AGGREGATE_SQL.format(new_rows=f"id > {p}"), (0,))
+    paths["quick_metrics/summary_table"] = lambda: (len(quick_metrics()), None)
+
+    def build_index():
+        index = PredictionIndex()
+        index.refresh()
+        return len(index), None
+
+    index = PredictionIndex()
+    index.refresh()
+    stops = next(generate_logs(10000, seed=1))[KEY_COLUMNS]
+    records = stops.head(1000).to_dict("records")
+    frames = index.lookup_frames()
+
+    paths["predict/index_build"] = build_index
+    paths["predict/single_x1000"] = lambda: (len([index.predict(record) for record in records]), None)
+    paths["predict/batch_10k"] = lambda: (len(predict_frame(stops, frames)), None)
+    paths["ledger/first_page"] = lambda: (len(fetch_page(loader=_ledger_loader)[0]), None)
+
+    results = {}
+    for name, run in paths.items():
+        results[name] = measure(run, repeats)
+        progress(f"{name}: p50 {results[name]['p50_ms']} ms, p95 {results[name]['p95_ms']} ms")
+    return results
+
+
+# Ledger pages straight from the database, not the result cache
+def _ledger_loader(query, params=None, ttl=None, dtypes=None):
+    return run_query(query, params, dtypes)
+
+
+# The first `rows` ledger rows loaded the old way (fetchall into object
+# columns) and through the typed loader: in-memory size and peak Python
+# memory while loading. The fetchall side needs several times the typed
+# side's memory, so keep `rows` to what the machine can hold.
+def frame_memory(rows):
+    pool = get_pool()
+    sql = f"select {', '.join(['id'] + LOG_COLUMNS)} from Police_Post_Logs order by id limit {int(rows)}"
+
+    def fetchall(cursor):
+        return pd.DataFrame(cursor.fetchall(), columns=[desc[0] for desc in cursor.description])
+
+    results = {}
+    def typed(cursor):
+        return read_frame(cursor, dtypes=LOG_DTYPES)
+
+    for name, load in (("fetchall", fetchall), ("typed", typed)):
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                tracemalloc.start()
+                started = time.perf_counter()
+                cursor.execute(sql)
+                data = load(cursor)
+                seconds = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            finally:
+                cursor.close()
+        results[name] = {
+            "rows": len(data),
+            "frame_bytes": int(data.memory_usage(index=True, deep=True).sum()),
+            "peak_python_bytes": peak,
+            "load_ms": round(seconds * 1000, 3),
+        }
+        del data
+    return results
+
+
+# Seconds to import modules in a fresh interpreter; None if one is not installed
+def import_seconds(modules):
+    code = ("import time; started = time.perf_counter()\n"
+            + "".join(f"import {module}\n" for module in modules)
+            + "print(time.perf_counter() - started)")
+    done = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if done.returncode:
+        return None
+    return round(float(done.stdout), 3)
+
+
+# What the dashboard imported on every page before plotting went lazy, and what
+# non-chart pages import now
+def startup_imports():
+    return {
+        "eager_plotting_s": import_seconds(["pandas", "matplotlib.pyplot", "plotly.express", "seaborn"]),
+        "pandas_only_s": import_seconds(["pandas"]),
+    }
+
+
+def compare(results, previous):
+    for name, now in results.items():
+        before = previous.get("results", {}).get(name)
+        if before and before["p50_ms"]:
+            print(f"{name}: p50 {before['p50_ms']} -> {now['p50_ms']} ms "
+                  f"({now['p50_ms'] / before['p50_ms']:.2f}x)")
+
+
+def _use_mysql_database(database):
+    import mysql.connector
+
+    config = {key: value for key, value in DB_CONFIG.items() if key != "database"}
+    connection = mysql.connector.connect(**config)
+    try:
+        connection.cursor().execute(f"create database if not exists `{database}`")
+    finally:
+        connection.close()
+    set_pool(mysql_pool(database))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SecureCheck queries on synthetic data")
+    parser.add_argument("--rows", default="10k", help="synthetic rows, e.g. 10k, 1M, 10M")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--sqlite", default="securecheck_bench.db", help="SQLite file to benchmark (default)")
+    target.add_argument("--mysql-database", help="local MySQL database to benchmark, created if missing")
+    parser.add_argument("--skip-load", action="store_true", help="reuse the data already loaded")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--frame-memory", type=parse_rows, metavar="ROWS",
+                        help="also compare DataFrame memory for this many ledger rows loaded both ways, e.g. 200k")
+    parser.add_argument("--compare", help="results JSON from an earlier run to compare p50 against")
+    args = parser.parse_args(argv)
+
+    if args.mysql_database:
+        if args.mysql_database == DB_CONFIG["database"]:
+            parser.error("refusing to overwrite the live ledger database")
+        _use_mysql_database(args.mysql_database)
+    else:
+        set_pool(sqlite_pool(args.sqlite))
+    rows = parse_rows(args.rows)
+    if not args.skip_load:
+        load_synthetic(rows, args.seed, progress=lambda message: print(message, file=sys.stderr))
+
+    results = benchmark_paths(args.repeats, progress=lambda message: print(message, file=sys.stderr))
+    report = {
+        "meta": {
+            "dialect": get_pool().dialect,
+            "rows": rows,
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "results": results,
+        "imports": startup_imports(),
+    }
+    if args.frame_memory:
+        try:
+            report["memory"] = frame_memory(args.frame_memory)
+        except MemoryError:
+            report["memory"] = {"error": f"out of memory loading {args.frame_memory} rows"}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            compare(results, json.load(handle))
+
+
+if __name__ == "__main__":
+    main()
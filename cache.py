@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from db import after_insert, run_query
+from telemetry import query_label, record_cache, status_source
+
+# Cache sizing
+
+CACHE_MAX_BYTES = 64 * 1024 * 1024   # memory budget for all cached results
+DEFAULT_TTL = 300                    # seconds a result stays fresh unless the query sets its own TTL
+VERSION_CHECK_SECONDS = 2            # how often to look for rows inserted by other processes
+
+
+# Same SQL written with different spacing or a trailing ";" shares one entry
+def normalize_sql(sql):
+    return " ".join(sql.split()).rstrip(";").strip()
+
+
+def _result_size(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# Highest log id, used to notice inserts made outside this process (notebook, ingestion)
+def _latest_log_id():
+    return run_query("select max(id) as latest_id from Police_Post_Logs").iloc[0, 0]
+
+
+class QueryCache:
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, default_ttl=DEFAULT_TTL,
+                 version_check=VERSION_CHECK_SECONDS, version_probe=_latest_log_id):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.version_check = version_check
+        self._version_probe = version_probe
+        self._entries = OrderedDict()   # key -> (result, size, expires_at), oldest use first
+        self._bytes = 0
+        self._generation = 0            # bumped on every invalidation
+        self._version = None
+        self._version_checked = 0.0
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "too_large": 0,
+        }
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            result, _, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._drop(key)
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return result
+
+    # Store a result loaded under `generation`; results loaded before an
+    # invalidation are thrown away so they can never be served afterwards
+    def put(self, key, result, ttl=None, generation=None):
+        size = _result_size(result)
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if size > self.max_bytes:
+                self.stats["too_large"] += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+            self._entries[key] = (result, size, time.monotonic() + ttl)
+            self._bytes += size
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+            self.stats["invalidations"] += 1
+
+    # Drop everything if rows were inserted since the last check, at most
+    # once every `version_check` seconds
+    def check_version(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._version_probe is None or now - self._version_checked < self.version_check:
+                return
+            self._version_checked = now
+        try:
+            version = self._version_probe()
+        except Exception:
+            return
+        with self._lock:
+            changed = self._version is not None and version != self._version
+            self._version = version
+        if changed:
+            self.invalidate()
+
+    # Return the cached result for sql+params, loading it with `loader` on a miss.
+    # Cached DataFrames are shared between sessions, so callers must not modify them.
+    def fetch(self, sql, params=None, loader=run_query, ttl=None):
+        if ttl == 0:
+            return loader(sql, params)
+        self.check_version()
+        key = (normalize_sql(sql), tuple(params or ()))
+        result = self.get(key)
+        if result is not None:
+            return result
+        with self._lock:
+            generation = self._generation
+        result = loader(sql, params)
+        self.put(key, result, ttl, generation)
+        return result
+
+    def status(self):
+        with self._lock:
+            status = dict(self.stats)
+            status.update(entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+        return status
+
+
+# Process-wide cache shared by every session
+
+query_cache = QueryCache()
+
+
+@after_insert
+def _invalidate_on_insert(records):
+    query_cache.invalidate()
+
+
+@status_source("cache")
+def _cache_status():
+    return query_cache.status()
+
+
+# Cached query; the statement itself is recorded by run_query on a miss.
+# `dtypes` are part of what the SQL means, so they are not part of the key.
+def cached_query(sql, params=None, ttl=None, dtypes=None):
+    return tracked_fetch(sql, params, partial(run_query, dtypes=dtypes), ttl, query_label(sql))
+
+
+# query_cache.fetch, recording under `label` whether the cache answered
+def tracked_fetch(sql, params, loader, ttl, label):
+    loaded = []
+
+    def load(sql, params):
+        loaded.append(True)
+        return loader(sql, params)
+
+    result = query_cache.fetch(sql, params, load, ttl)
+    record_cache(label, "bypass" if ttl == 0 else "miss" if loaded else "hit")
+    return result
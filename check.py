@@ -1,57 +1,31 @@
-import mysql.connector.cursor
-import pandas as pd
-import mysql.connector
-import streamlit as st
-import matplotlib.pyplot as plt
-import plotly.express as px
-import seaborn as sns
-
-# Database connection
+import time
 
-import mysql.connector
 import pandas as pd
 import streamlit as st
 
-# Create a new database connection
-def new_connection():
-    try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="pttv",
-            database="policeledger"
-        )
-        return connection  # Return the connection, not mysql
-    except mysql.connector.Error as e:
-        st.error(f"Connection Error: {e}")
-        return None
-
-# Fetch data using a SQL query
-def fetch_data(query):
-    connection = new_connection()
-    if connection:
-        try:
-            cursor = connection.cursor()
-            cursor.execute(query)
-            data = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description]
-            df = pd.DataFrame(data, columns=columns)
-            return df
-        except mysql.connector.Error as e:
-            st.error(f"Query Error: {e}")
-            return pd.DataFrame()
-        finally:
-            cursor.close()       # Properly close cursor
-            connection.close()   # Close connection
-    else:
-        return pd.DataFrame()
+# Database connection
 
+from db import PoolError, QueryError
+from cache import query_cache
+from metrics import METRIC_COLUMNS, quick_metrics
+from ledger import FILTER_COLUMNS, LEDGER_COLUMNS, PAGE_SIZES, SORT_COLUMNS, fetch_page, filter_options
+from predict import DEFAULT_PREDICTION, predict
+from queries import query_map
+from analytics import engines_for, run_snapshot_query, snapshot_ready
+from async_query import QueryCancelled, QueryTimeout, gather, submit, submit_call
+from live_tail import live_tail
+from vehicles import check_watch_list, get_vehicle_index, lookup_vehicle, search_vehicles
+from telemetry import metrics_store, prometheus_text, record_page, serve_metrics, statuses
 
 # Streamlit UI
 
 st.set_page_config(page_title="SecureCheck - Police Post Logs", layout="wide")
+serve_metrics()
+page_started=time.perf_counter()
 st.title("🔒 SecureCheck: Police Post Log Ledger")
-menu = st.sidebar.selectbox("Go to", ["Home","Data Analytics & Visuals","View Logs","Predict Logs"])
+menu = st.sidebar.selectbox("Go to", ["Home","Data Analytics & Visuals","View Logs","Predict Logs","Vehicle Lookup","Admin"])
+with st.sidebar.expander("Query cache"):
+    st.json(query_cache.status())
 
 # Main page of securecheck and The Ledger view
 
@@ -59,9 +33,88 @@ if menu=='Home':
     st.markdown("### 👮 Welcome to SecureCheck")
     st.write("This system is designed to maintain secure, tamper-proof digital records of police post activities.")
     st.header("📋Police Logs Overview")
-    query="select * from Police_Post_Logs"
-    data=fetch_data(query)
+
+    # Live tail: new logs and Quick Metrics refresh on their own without
+    # rerunning the page; every open dashboard shares one poller
+    col1, col2 = st.columns([1,3])
+    with col1:
+        live=st.toggle("Live tail")
+    with col2:
+        interval=st.select_slider("Refresh every (seconds)", [1,2,5,10,30], value=2, disabled=not live)
+    if live:
+        @st.fragment(run_every=interval)
+        def show_live_tail():
+            started=time.perf_counter()
+            try:
+                rows, metrics, gap=live_tail.read(st.session_state.get("live_seen"))
+            except (PoolError, QueryError) as e:
+                st.error(f"Query Error: {e}")
+                return
+            previous=st.session_state.get("live_metrics", metrics)
+            if rows:
+                st.session_state.live_seen=rows[-1]["id"]
+                st.session_state.live_rows=(st.session_state.get("live_rows", [])+rows)[-50:]
+            st.session_state.live_metrics=metrics
+            if gap:
+                st.warning("More logs arrived than the tail can show; older ones were skipped.")
+            col1, col2, col3, col4 = st.columns(4)
+            for col, label, key in zip((col1, col2, col3, col4),
+                                       ("Total Police Stops","Total Arrests","Total Warnings","Drug Related Stops"),
+                                       METRIC_COLUMNS):
+                with col:
+                    st.metric(label, metrics[key], metrics[key]-previous[key] or None)
+            st.dataframe(pd.DataFrame(st.session_state.get("live_rows", [])[::-1]), use_container_width=True)
+            record_page("Home: live tail", time.perf_counter()-started)
+
+        show_live_tail()
+        st.markdown("---")
+
+    # Only the visible page is fetched, sorted and filtered in the database
+
+    columns=st.multiselect("Columns", LEDGER_COLUMNS, default=LEDGER_COLUMNS)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort=st.selectbox("Sort By", SORT_COLUMNS)
+    with col2:
+        descending=st.selectbox("Order", ["Newest first","Oldest first"])=="Newest first"
+    with col3:
+        page_size=st.selectbox("Rows per page", PAGE_SIZES, index=1)
+    filters={}
+    with st.expander("Filters"):
+        for column in FILTER_COLUMNS:
+            try:
+                options=filter_options(column)
+            except (PoolError, QueryError):
+                options=[]
+            choice=st.selectbox(column, ["All"]+options)
+            if choice!="All":
+                filters[column]=choice
+
+    # Restart from the first page whenever the view changes
+    view=(tuple(columns), sort, descending, page_size, tuple(sorted(filters.items())))
+    if st.session_state.get("ledger_view")!=view:
+        st.session_state.ledger_view=view
+        st.session_state.ledger_cursors=[None]
+    cursors=st.session_state.ledger_cursors
+
+    try:
+        data, next_cursor=fetch_page(columns or None, sort, descending, filters, cursors[-1], page_size)
+    except (PoolError, QueryError) as e:
+        st.error(f"Query Error: {e}")
+        data, next_cursor=pd.DataFrame(), None
     st.dataframe(data,use_container_width=True)
+
+    col1, col2, col3 = st.columns([1,2,1])
+    with col1:
+        if st.button("⬅ Previous", disabled=len(cursors)==1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.write(f"Page {len(cursors)}")
+    with col3:
+        if st.button("Next ➡", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
     st.markdown("---")  
     st.subheader("📝 Description")
     st.markdown("""
@@ -75,38 +128,46 @@ if menu=='Home':
 
 elif menu=='Data Analytics & Visuals':
 
-    # Quick Metrics
+    # Quick Metrics (counted in the database and kept in a summary table) and
+    # both chart queries run concurrently, so the page waits for the slowest one
 
-    query="select * from Police_Post_Logs"
-    data=fetch_data(query)
+    # SQL Query to fetch violation and its counts
+    violation_query="select violation,count(violation) as counts from Police_Post_Logs group by violation"
+    # SQL Query to fetch Gender of Driver and its counts
+    gender_query="select driver_gender, count(*) as count from Police_Post_Logs group by driver_gender"
+    results=gather({
+        "metrics": submit_call(quick_metrics),
+        "violations": submit(violation_query),
+        "genders": submit(gender_query),
+    })
+    for name, value in results.items():
+        if isinstance(value, Exception):
+            st.error(f"Query Error: {value}")
+            results[name]=dict.fromkeys(METRIC_COLUMNS, 0) if name=="metrics" else pd.DataFrame()
+    metrics=results["metrics"]
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        total_stops=data.shape[0]
-        st.metric("Total Police Stops", total_stops)
+        st.metric("Total Police Stops", metrics["total_stops"])
 
     with col2:
-            
-        arrests = data[data["stop_outcome"].str.contains("arrest", case=False, na=False)].shape[0]
-        st.metric("Total Arrests", arrests)
+        st.metric("Total Arrests", metrics["total_arrests"])
 
     with col3:
-        warnings = data[data["stop_outcome"].str.contains("Warning", case=False, na=False)].shape[0]
-        st.metric("Total Warnings", warnings)
+        st.metric("Total Warnings", metrics["total_warnings"])
 
     with col4:
-        drug_stop = data[data["drugs_related_stop"] == 1].shape[0]
-        st.metric("Drug Related Stops", drug_stop)
+        st.metric("Drug Related Stops", metrics["drug_related_stops"])
     
     # Data Visulaization Using Bar Chart
+    # matplotlib is imported here, not at the top, so the other pages never load it
+
+    import matplotlib.pyplot as plt
 
     st.header("📊 Visual Insights")      
     tab= st.tabs(['Stops By Violations', 'Driver Gender Distribution'])
     with tab[0]:
 
-    # SQL Query to fetch violation and its counts
-
-        query="select violation,count(violation) as counts from Police_Post_Logs group by violation"
-        data=fetch_data(query)
+        data=results["violations"]
         st.dataframe(data)
 
         fig, ax = plt.subplots(figsize=(4, 2.5))
@@ -120,11 +181,8 @@ elif menu=='Data Analytics & Visuals':
         st.pyplot(fig)
 
     with tab[1]:
-         
-    # SQL Query to fetch Gender of Driver and its counts
 
-         query="select driver_gender, count(*) as count from Police_Post_Logs group by driver_gender"
-         data=fetch_data(query)
+         data=results["genders"]
          st.dataframe(data)
 
          fig, ax = plt.subplots(figsize=(4, 2.5)) 
@@ -145,191 +203,57 @@ elif menu=='View Logs':
 
 # Questions are added into selectbox
 
-    selected_query=st.selectbox("select a Query to Run",[
-    "Top 10 vehicle_number involved in drug_related stops",
-    "Most frequently searched vehicle",
-    "Driver age group had the highest arrest rate"  ,
-    "Gender Distribution of Drivers stopped in each Country" ,
-    "Time of day sees the most traffic stops",
-    "Average stop duration for different violations"   ,
-    "Highest search rate of race and gender combination",
-    "Stops are during the night more likely to lead to arrests",
-    "Which violations are most associated with searches or arrests",
-    "Which violations are most common among younger drivers (<25)",
-    "Is there a violation that rarely results in search or arrest",
-    "Which countries report the highest rate of drug-related stops",
-    "What is the arrest rate by country and violation",
-    "Which country has the most stops with search conducted",
-    "Yearly Breakdown of Stops and Arrests by Country ",
-    "Driver Violation Trends Based on Age and Race",
-    "Number of Stops by Year,Month, Hour of the Day",
-    "Violations with High Search and Arrest Rates",
-    "Driver Demographics by Country (Age, Gender, and Race)",
-    "Top 5 Violations with Highest Arrest Rates" ]                      
-    )
-    query_map={
-            "Top 10 vehicle_number involved in drug_related stops": "select vehicle_number from Police_Post_Logs where drugs_related_stop=1 order by vehicle_number desc limit 10",
-            "Most frequently searched vehicle":"select vehicle_number, count(*) as count from Police_Post_Logs group by vehicle_number order by vehicle_number desc limit 1",
-            "Driver age group had the highest arrest rate" : """select case
-                                                            when driver_age between 18 and 25 then '18-25'
-                                                            when driver_age between 26 and 35 then '26-35'
-                                                            when driver_age between 36 and 45 then '36-45'
-                                                            when driver_age between 45 and 60 then '45-60'
-                                                            else '60+'
-                                                            end as age_group,count(*) as total_driver,
-                                                            sum(case when is_arrested=1 then 1 else 0 end) as total_arrests,
-                                                            round(sum(case when is_arrested=1 then 1 else 0 end)*100.0/count(*),2) as arrest_rate_percent 
-                                                            from Police_Post_Logs group by age_group
-                                                            order by arrest_rate_percent desc limit 1""",
-            "Gender Distribution of Drivers stopped in each Country" :"""select country_name,driver_gender,count(*) as total_gender,
-                                                                        ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (PARTITION BY country_name), 2) AS gender_percent
-                                                                        from Police_Post_Logs
-                                                                        group by country_name,driver_gender
-                                                                        order by country_name, driver_gender
-                                                                        """,
-            "Time of day sees the most traffic stops" : """select extract(hour from stop_time) as hour_of_day, count(*) as total_stops
-                                                                        from Police_Post_Logs
-                                                                        group by extract(hour from stop_time)
-                                                                        order by total_stops desc
-                                                                        limit 1""",
-            "Average stop duration for different violations" :"""select violation, avg(stop_duration) as Average_of_stop_duration
-                                                                from Police_Post_Logs
-                                                                group by violation
-                                                                order by violation
-                                                                desc""" ,
-            "Highest search rate of race and gender combination": """select driver_race,driver_gender, count(*) as total_gender,
-                                                                    round(100.0* count(*)/ sum(count(*)) over (partition by driver_race),2) as gender_percent
-                                                                    from Police_Post_Logs
-                                                                    group by driver_race, driver_gender
-                                                                    order by driver_race
-                                                                    desc limit 2""",
-            "Stops are during the night more likely to lead to arrests":"""select case
-                                                                        when extract(hour from stop_time) between 20 and 23 or extract(hour from stop_time) between 0 and 5 then 'Night'
-                                                                        else 'Day'
-                                                                        end as time_of_day,
-                                                                        count(*) as total_stops,
-                                                                        sum(case when is_arrested=1 then 1 else 0 end) as total_arrests
-                                                                        from Police_Post_Logs
-                                                                        group by time_of_day
-                                                                        order by time_of_day""",
-            "Which violations are most associated with searches or arrests":"""select violation,count(*) as total_stops,
-                                                                         sum(case when is_arrested=1 then 1 else 0 end) as total_arrests
-                                                                         from Police_Post_Logs
-                                                                         group by violation
-                                                                         order by total_arrests
-                                                                         desc limit 1""",
-            "Which violations are most common among younger drivers (<25)" : """select violation,count(*) as total_stops,
-                                                                        sum(case when driver_age <25 then 1 else 0 end) as number_of_driver_under_25
-                                                                        from Police_Post_Logs
-                                                                        group by violation
-                                                                        order by number_of_driver_under_25
-                                                                        desc limit 1""",
-            "Is there a violation that rarely results in search or arrest": """select violation,count(*) as total_stops,
-                                                                        sum(case when is_arrested=1 then 1 else 0 end) as total_arrests
-                                                                         from Police_Post_Logs
-                                                                         group by violation
-                                                                         order by total_arrests
-                                                                        asc limit 1
-                                                                        """,
-            "Which countries report the highest rate of drug-related stops":"""select country_name, count(*) as total_stops,
-                                                                            sum(case when drugs_related_stop=1 then 1 else 0 end) as total_drug_related_stop,
-                                                                            ROUND(100.0 * sum(case when drugs_related_stop=1 then 1 else 0 end)/ COUNT(*), 2) AS drug_stop_rate_percent
-                                                                            from Police_Post_Logs
-                                                                            group by country_name
-                                                                            order by drug_stop_rate_percent
-                                                                            desc limit 1""",
-            "What is the arrest rate by country and violation": """ select country_name,count(*) as total_stops, violation,
-                                                                    sum(case when is_arrested=1 then 1 else 0 end) as total_arrests,
-                                                                    round(100.0*sum(case when is_arrested=1 then 1 else 0 end)/count(*),2) as total_arrest_percent
-                                                                    from Police_Post_Logs
-                                                                    group by country_name, violation
-                                                                    order by country_name""",
-            "Which country has the most stops with search conducted":"""select country_name, count(*) as total_stops
-                                                                    from Police_Post_Logs 
-                                                                    group by country_name
-                                                                    order by total_stops
-                                                                    desc limit 1""",
-            "Yearly Breakdown of Stops and Arrests by Country " : """select year,country_name,total_stops,total_arrests
-                                                                    from(select year,country_name,total_stops,total_arrests,
-                                                                    sum(total_stops) over (partition by year) as yearly_total_stops,
-                                                                    sum(total_arrests) over (partition by year) as yearly_total_arrests
-                                                                    from 
-                                                                    (select extract(year from stop_date) as year,country_name,count(*) as total_stops,
-                                                                    sum(case when is_arrested=1 then 1 else 0 end)as total_arrests
-                                                                    from Police_Post_Logs
-                                                                    group by extract(year from stop_date), country_name) as agg_data
-                                                                    ) as base_data
-                                                                    order by year,country_name"""  ,
-            "Driver Violation Trends Based on Age and Race" :  """select driver_age,driver_race,violation,count(*) as total_violation
-                                                                  from
-                                                                  (select case
-                                                                   WHEN driver_age < 20 THEN '<20'
-                                                                   WHEN driver_age BETWEEN 20 AND 29 THEN '20-29'
-                                                                   WHEN driver_age BETWEEN 30 AND 39 THEN '30-39'
-                                                                   WHEN driver_age BETWEEN 40 AND 49 THEN '40-49'
-                                                                   WHEN driver_age >= 50 THEN '50+'
-                                                                   END AS driver_age, driver_race,violation
-                                                                   FROM Police_Post_Logs) AS grouped_data
-                                                                   GROUP BY driver_age, driver_race, violation
-                                                                   ORDER BY driver_age,driver_race, violation""",
-            "Number of Stops by Year,Month, Hour of the Day": """select extract(year from stop_date) as year,
-                                                                 extract(month from stop_date) as month,
-                                                                 extract(hour from stop_time) as hour,
-                                                                 count(*) as total_stops
-                                                                 from Police_Post_Logs
-                                                                 group by 
-                                                                 extract(year from stop_date),
-                                                                 extract(month from stop_date),
-                                                                 extract(hour from stop_time)
-                                                                 order by year,month,hour""" ,
-            "Violations with High Search and Arrest Rates"  : """SELECT violation,total_stops,total_arrests,
-                                                                 ROUND(100.0 * total_arrests / NULLIF(total_stops, 0), 2) AS arrest_rate_percent,
-                                                                 RANK() OVER (ORDER BY ROUND(100.0 * total_arrests / NULLIF(total_stops, 0), 2) DESC) AS arrest_rate_rank
-                                                                 from 
-                                                                 (SELECT violation,COUNT(*) AS total_stops,
-                                                                  COUNT(CASE WHEN is_arrested = 1 THEN 1 END) AS total_arrests
-                                                                  FROM Police_Post_Logs
-                                                                  GROUP BY violation
-                                                                  ) AS agg
-                                                                  ORDER BY arrest_rate_percent DESC
-                                                                  """,
-            "Driver Demographics by Country (Age, Gender, and Race)":""" SELECT country_name,driver_gender,driver_race,
-                                                                    CASE 
-                                                                    WHEN driver_age < 20 THEN '<20'
-                                                                    WHEN driver_age BETWEEN 20 AND 29 THEN '20-29'
-                                                                    WHEN driver_age BETWEEN 30 AND 39 THEN '30-39'
-                                                                    WHEN driver_age BETWEEN 40 AND 49 THEN '40-49'
-                                                                    WHEN driver_age BETWEEN 50 AND 59 THEN '50-59'
-                                                                    ELSE '60+'
-                                                                    END AS age_group,
-                                                                    COUNT(*) AS total_drivers
-                                                                    FROM Police_Post_Logs
-                                                                    GROUP BY 
-                                                                    country_name,driver_gender,driver_race, 
-                                                                    CASE 
-                                                                    WHEN driver_age < 20 THEN '<20'
-                                                                    WHEN driver_age BETWEEN 20 AND 29 THEN '20-29'
-                                                                    WHEN driver_age BETWEEN 30 AND 39 THEN '30-39'
-                                                                    WHEN driver_age BETWEEN 40 AND 49 THEN '40-49'
-                                                                    WHEN driver_age BETWEEN 50 AND 59 THEN '50-59'
-                                                                    ELSE '60+'
-                                                                    END 
-                                                                    ORDER BY country_name, driver_gender, driver_race, age_group"""  ,
-                                                                     
-            "Top 5 Violations with Highest Arrest Rates" : """ select violation, count(*) as total_stops,
-                                                               count(case when is_arrested=1 then 1 end) as total_arrests,
-                                                               round(100.0*count(case when is_arrested=1 then 1 end)/nullif(count(*),0),2)as arrest_rate_percent
-                                                               from Police_Post_Logs
-                                                               group by violation
-                                                               order by arrest_rate_percent desc
-                                                               limit 5"""   }
+    selected_query=st.selectbox("select a Query to Run",list(query_map))
+    engine=st.radio("Run on", engines_for(selected_query), horizontal=True,
+                    help="The columnar snapshot is a periodically refreshed Parquet copy of the ledger")
+
     
-# Answers are fetched From Database using functions
+# Answers are fetched From Database in the background with a deadline; the running
+# query is kept in the session so the Cancel button can stop it on the server
 
+    QUERY_TIMEOUT=60
     result = pd.DataFrame()
     
-    if st.button("Run Query"):
-        result=fetch_data(query_map[selected_query])    
+    col1, col2 = st.columns([1,5])
+    with col1:
+        if st.button("Run Query"):
+            previous=st.session_state.get("pending_query")
+            if previous:
+                previous.cancel()
+            # Until the snapshot has been built in the background the query runs live
+            use_snapshot=engine=="Columnar snapshot" and snapshot_ready()
+            if engine=="Columnar snapshot" and not use_snapshot:
+                st.info("The columnar snapshot is being built; running this query on MySQL meanwhile")
+            if use_snapshot:
+                st.session_state.pending_query=submit_call(run_snapshot_query, query_map[selected_query],
+                                                           timeout=QUERY_TIMEOUT, label=selected_query)
+            else:
+                st.session_state.pending_query=submit(query_map[selected_query], timeout=QUERY_TIMEOUT,
+                                                      ttl=600, label=selected_query)
+    with col2:
+        # The button was drawn enabled before the last run finished the query,
+        # so the handle may already be gone when it is clicked
+        if st.button("Cancel Query", disabled=st.session_state.get("pending_query") is None):
+            running=st.session_state.get("pending_query")
+            if running:
+                running.cancel()
+    handle=st.session_state.get("pending_query")
+    if handle is not None:
+        status=st.empty()
+        # Short waits with a status update in between let Streamlit stop this
+        # run when Cancel is clicked
+        while not handle.wait(0.2):
+            status.caption(f"Running query... {handle.elapsed():.1f}s")
+        status.empty()
+        st.session_state.pending_query=None
+        try:
+            result=handle.result()
+        except QueryCancelled:
+            st.info("Query cancelled")
+        except QueryTimeout as e:
+            st.error(f"Query Timeout: {e}")
+        except (PoolError, QueryError) as e:
+            st.error(f"Query Error: {e}")
     if not result.empty:
             st.write(result)
     else:
@@ -339,8 +263,6 @@ elif menu=='View Logs':
 
 elif menu=="Predict Logs":
                
-            query="select * from Police_Post_Logs"
-            data=fetch_data(query)
             st.markdown("---")
             st.markdown("Built With ❤️ for Law Enforcement By SecureCheck")
             st.header("🔍 Custom Natural Language Filter")
@@ -360,26 +282,31 @@ elif menu=="Predict Logs":
                 search_conducted=st.selectbox("Was a Search Conducted?", ["0","1"])
                 search_type=st.text_input("Search Type")
                 drugs_related_stop=st.selectbox("was it Drug Related?",["0",'1'])
-                stop_duration=st.selectbox("Stop Duration",data["stop_duration"].dropna().unique())
+                try:
+                    durations=filter_options("stop_duration")
+                except (PoolError, QueryError) as e:
+                    st.error(f"Query Error: {e}")
+                    durations=[]
+                stop_duration=st.selectbox("Stop Duration",durations)
                 vehicle_number=st.text_input("Vehicle Number")
                 submitted=st.form_submit_button("Predict Stop Outcome & Violation")
                 
             if submitted:
-                filtered_data=data[
-                    (data["driver_gender"]== driver_gender)&
-                    (data["driver_age"]== driver_age)&
-                    (data["search_conducted"]==int(search_conducted))&
-                    (data["stop_duration"]==stop_duration)&
-                    (data["drugs_related_stop"]==drugs_related_stop)
-                ]
-         # Predict Stop_Outcome
-
-                if not filtered_data.empty:
-                    predicted_outcome=filtered_data["stop_outcome"].mode()[0]
-                    predicted_violation=filtered_data["violation"].mode()[0]
-                else:
-                    predicted_outcome="Warning"  # Default
-                    predicted_violation="Speeding" # Default
+         # Predict Stop_Outcome from the prebuilt lookup index
+
+                try:
+                    prediction=predict({
+                        "driver_gender": driver_gender,
+                        "driver_age": driver_age,
+                        "search_conducted": search_conducted,
+                        "stop_duration": stop_duration,
+                        "drugs_related_stop": drugs_related_stop,
+                    })
+                except (PoolError, QueryError) as e:
+                    st.error(f"Query Error: {e}")
+                    prediction=dict(DEFAULT_PREDICTION)
+                predicted_outcome=prediction["stop_outcome"]
+                predicted_violation=prediction["violation"]
 
          # Natural Language Summary
 
@@ -395,4 +322,103 @@ elif menu=="Predict Logs":
                             📝 A {driver_age}-year-old {driver_gender} driver in {country_name} was stopped at {stop_time.strftime('%I:%M %p')} on {stop_date}.
                             {search_text}, and the stop {drug_text}.
                             stop duration: **{stop_duration}**
-                            vehicle Number: **{vehicle_number}**.""" )  
\ No newline at end of file
+                            vehicle Number: **{vehicle_number}**.""" )  
+
+# Suspect vehicle lookup, answered from the in-memory vehicle index
+
+elif menu=="Vehicle Lookup":
+    st.header("🚗 Vehicle Lookup")
+    plate=st.text_input("Vehicle Number (full plate or the first few characters)")
+    if plate:
+        try:
+            vehicle=lookup_vehicle(plate)
+            matches=search_vehicles(plate)
+        except (PoolError, QueryError) as e:
+            st.error(f"Query Error: {e}")
+            vehicle, matches=None, []
+        if vehicle:
+            if vehicle["flags"]:
+                st.error(f"⚠️ {vehicle['vehicle_number']} flagged: {', '.join(vehicle['flags'])}")
+            else:
+                st.success(f"{vehicle['vehicle_number']} has no arrests or drug related stops on record")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Stops", vehicle["stops"])
+            with col2:
+                st.metric("Searches", vehicle["searches"])
+            with col3:
+                st.metric("Arrests", vehicle["arrests"])
+            with col4:
+                st.metric("Drug Related Stops", vehicle["drug_stops"])
+            st.caption(f"Last seen: {vehicle['last_seen']}")
+        else:
+            st.info("No exact match for this plate")
+        if matches:
+            st.subheader("Plates starting with "+plate.upper())
+            st.dataframe(pd.DataFrame(matches),use_container_width=True)
+
+    st.markdown("---")
+    st.subheader("Watch-list check")
+    plates=st.text_area("Vehicle numbers, one per line")
+    if st.button("Check") and plates.strip():
+        try:
+            hits=check_watch_list(plates.splitlines())
+        except (PoolError, QueryError) as e:
+            st.error(f"Query Error: {e}")
+            hits={}
+        if hits:
+            st.dataframe(pd.DataFrame([{"vehicle_number": plate, "flags": ", ".join(flags)}
+                                       for plate, flags in hits.items()]),use_container_width=True)
+        else:
+            st.success("None of these vehicles are flagged")
+
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+    try:
+        index=get_vehicle_index()
+        most_searched, most_drugs=index.top("searches"), index.top("drug_stops")
+    except (PoolError, QueryError) as e:
+        st.error(f"Query Error: {e}")
+        most_searched, most_drugs=[], []
+    with col1:
+        st.subheader("Most searched vehicles")
+        st.dataframe(pd.DataFrame(most_searched),use_container_width=True)
+    with col2:
+        st.subheader("Most drug related stops")
+        st.dataframe(pd.DataFrame(most_drugs),use_container_width=True)
+
+# Instrumentation: query latency, cache use, page render times and the slow-query log
+
+elif menu=="Admin":
+    st.header("⏱️ Query & Page Instrumentation")
+    col1, col2 = st.columns([1,5])
+    with col1:
+        if st.button("Reset"):
+            metrics_store.reset()
+    with col2:
+        st.download_button("Prometheus export", prometheus_text(), file_name="securecheck_metrics.txt")
+
+    queries=pd.DataFrame(metrics_store.query_summary())
+    st.subheader("Queries")
+    if queries.empty:
+        st.info("No queries recorded yet")
+    else:
+        queries=queries.sort_values("p95_ms", ascending=False)
+        st.dataframe(queries.set_index("query"),use_container_width=True)
+        chosen=st.selectbox("Latency histogram for", ["All queries"]+queries["query"].tolist())
+        histogram=metrics_store.histogram(None if chosen=="All queries" else chosen)
+        st.bar_chart(pd.Series(histogram, name="queries"))
+
+    st.subheader("Page render time")
+    pages=pd.DataFrame(metrics_store.page_summary())
+    if not pages.empty:
+        st.dataframe(pages.set_index("page"),use_container_width=True)
+        st.bar_chart(pd.Series(metrics_store.histogram(pages=True), name="renders"))
+
+    st.subheader("Slow queries")
+    st.dataframe(pd.DataFrame(metrics_store.slow_queries()),use_container_width=True)
+
+    st.subheader("Pool, cache and live tail")
+    st.json(statuses())
+
+record_page(menu, time.perf_counter()-page_started)
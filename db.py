@@ -0,0 +1,475 @@
+import contextlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from telemetry import query_label, record_query, status_source
+
+# Database connection settings
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "pttv",
+    "database": "policeledger",
+}
+
+# Set SECURECHECK_SQLITE=<file> to run against a local SQLite copy instead of MySQL
+SQLITE_PATH = os.environ.get("SECURECHECK_SQLITE")
+
+# Pool sizing and health checks
+
+POOL_SIZE = 5            # connections kept open between page views
+MAX_OVERFLOW = 5         # extra connections allowed under load, closed on release
+POOL_TIMEOUT = 10        # seconds to wait for a free connection
+RECYCLE_SECONDS = 1800   # reopen connections older than this
+PING_AFTER = 30          # ping connections idle longer than this before reuse
+
+
+class PoolError(Exception):
+    pass
+
+
+class PoolTimeout(PoolError):
+    pass
+
+
+class QueryError(Exception):
+    pass
+
+
+# One pooled connection with the times used by the health checks
+class _PooledConnection:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = time.monotonic()
+        self.last_used = self.created
+
+
+class ConnectionPool:
+
+    def __init__(self, connect, size=POOL_SIZE, max_overflow=MAX_OVERFLOW, timeout=POOL_TIMEOUT,
+                 recycle=RECYCLE_SECONDS, ping_after=PING_AFTER, placeholder="%s", errors=(),
+                 dialect="mysql"):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.placeholder = placeholder    # "%s" for mysql.connector, "?" for sqlite3
+        self.errors = tuple(errors)       # driver exceptions turned into QueryError
+        self.dialect = dialect
+        self._idle = queue.LifoQueue()    # most recently used first, so extras go idle and age out
+        self._lock = threading.Lock()
+        self._open = 0
+        self._in_use = 0
+        self.stats = {
+            "created": 0,
+            "reused": 0,
+            "discarded": 0,
+            "health_failures": 0,
+            "waits": 0,
+            "checkouts": 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    # Open a brand-new connection if the pool has room for one
+    def _grow(self):
+        with self._lock:
+            if self._open >= self.size + self.max_overflow:
+                return None
+            self._open += 1
+        try:
+            pooled = _PooledConnection(self._connect())
+        except Exception as e:
+            with self._lock:
+                self._open -= 1
+            raise PoolError(f"Could not open a database connection: {e}") from e
+        self._count("created")
+        return pooled
+
+    def _discard(self, pooled):
+        with self._lock:
+            self._open -= 1
+            self.stats["discarded"] += 1
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+    # Recycle old connections and ping the ones that have been idle for a while
+    def _healthy(self, pooled):
+        now = time.monotonic()
+        if now - pooled.created > self.recycle:
+            return False
+        if now - pooled.last_used <= self.ping_after:
+            return True
+        try:
+            cursor = pooled.connection.cursor()
+            cursor.execute("select 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            self._count("health_failures")
+            return False
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._grow()
+                if pooled is not None:
+                    break
+                self._count("waits")
+                remaining = deadline - time.monotonic()
+                try:
+                    pooled = self._idle.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    raise PoolTimeout(f"No free database connection after {self.timeout}s") from None
+            if self._healthy(pooled):
+                self._count("reused")
+                break
+            self._discard(pooled)
+        with self._lock:
+            self._in_use += 1
+            self.stats["checkouts"] += 1
+        return pooled
+
+    def _release(self, pooled):
+        with self._lock:
+            self._in_use -= 1
+        # End any open transaction so the next user of this connection
+        # does not read from an old snapshot
+        try:
+            pooled.connection.rollback()
+        except Exception:
+            self._discard(pooled)
+            return
+        if self._idle.qsize() >= self.size:
+            self._discard(pooled)
+            return
+        pooled.last_used = time.monotonic()
+        self._idle.put(pooled)
+
+    # Borrow a connection for the duration of a with-block.
+    # Writes must commit inside the block; anything uncommitted is rolled back on release.
+    @contextlib.contextmanager
+    def connection(self):
+        pooled = self._checkout()
+        try:
+            yield pooled.connection
+        finally:
+            self._release(pooled)
+
+    # A connection outside the pool and its limits, for work that must not
+    # wait for a free one (killing a running query); closed after the block
+    @contextlib.contextmanager
+    def dedicated_connection(self):
+        try:
+            connection = self._connect()
+        except Exception as e:
+            raise PoolError(f"Could not open a database connection: {e}") from e
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def close(self):
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
+
+    def status(self):
+        with self._lock:
+            status = dict(self.stats)
+            status.update(open=self._open, in_use=self._in_use, idle=self._idle.qsize(),
+                          size=self.size, max_overflow=self.max_overflow)
+        return status
+
+
+# Pool factories
+
+def mysql_pool(database=None, **kwargs):
+    import mysql.connector
+
+    config = dict(DB_CONFIG, database=database or DB_CONFIG["database"])
+    return ConnectionPool(lambda: mysql.connector.connect(**config),
+                          errors=(mysql.connector.Error,), **kwargs)
+
+
+def sqlite_pool(path, **kwargs):
+    return ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False),
+                          placeholder="?", errors=(sqlite3.Error,), dialect="sqlite", **kwargs)
+
+
+# Process-wide pool. Streamlit reruns only the page script, so this module
+# and its pool stay alive across reruns and sessions.
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = sqlite_pool(SQLITE_PATH) if SQLITE_PATH else mysql_pool()
+        return _pool
+
+
+@status_source("pool")
+def _pool_status():
+    return _pool.status() if _pool is not None else {}
+
+
+# Swap in another pool, e.g. a SQLite stand-in, and close the old one
+def set_pool(pool):
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, pool
+    if old is not None and old is not pool:
+        old.close()
+
+
+# MySQL date/time functions used by the canned queries, rewritten for SQLite
+
+SQLITE_EXTRACT = {"year": "%Y", "month": "%m", "day": "%d", "hour": "%H", "minute": "%M"}
+EXTRACT_PATTERN = re.compile(r"extract\s*\(\s*(year|month|day|hour|minute)\s+from\s+([\w.]+)\s*\)", re.IGNORECASE)
+
+
+def translate_sql(query, dialect):
+    if dialect != "sqlite":
+        return query
+    return EXTRACT_PATTERN.sub(
+        lambda match: f"cast(strftime('{SQLITE_EXTRACT[match.group(1).lower()]}', {match.group(2)}) as integer)",
+        query)
+
+
+# Typed result frames.
+# Rows are read from the cursor in batches and each batch is converted as it
+# arrives, so a large result never sits in memory as Python tuples of str.
+# The caller names the dtypes (LOG_DTYPES for Police_Post_Logs rows), so every
+# batch of a result gets the same ones; values that do not fit become missing.
+# Columns not named are left as the driver returned them.
+
+FETCH_SIZE = 10000
+
+LOG_DTYPES = {
+    "stop_date": "datetime64[us]",
+    "stop_time": "timedelta64[us]",
+    "country_name": "category",
+    "driver_gender": "category",
+    "driver_age": "Int16",
+    "driver_race": "category",
+    "violation": "category",
+    "search_conducted": "Int8",
+    "search_type": "category",
+    "stop_outcome": "category",
+    "is_arrested": "Int8",
+    "stop_duration": "category",
+    "drugs_related_stop": "Int8",
+}
+
+
+def _convert(values, dtype):
+    if dtype == "category":
+        return values.astype("category")
+    if dtype.startswith("datetime64"):
+        return pd.to_datetime(values, errors="coerce", format="ISO8601").astype(dtype)
+    if dtype.startswith("timedelta64"):
+        return pd.to_timedelta(values, errors="coerce").astype(dtype)
+    return pd.to_numeric(values, errors="coerce").astype(dtype)
+
+
+def _typed(frame, dtypes):
+    for column, dtype in (dtypes or {}).items():
+        if column in frame.columns:
+            frame[column] = _convert(frame[column], dtype)
+    return frame
+
+
+# Stack batches, giving each categorical column the union of the batches'
+# categories so it stays categorical instead of falling back to object
+def _concat(frames):
+    if len(frames) == 1:
+        return frames[0]
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            categories = pd.Index([])
+            for frame in frames:
+                categories = categories.append(frame[column].cat.categories)
+            categories = categories.unique()
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+# Read an executed cursor into a DataFrame, FETCH_SIZE rows at a time,
+# converting the columns named in `dtypes`
+def read_frame(cursor, fetch_size=FETCH_SIZE, dtypes=None):
+    columns = [desc[0] for desc in cursor.description]
+    frames = []
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        frames.append(_typed(pd.DataFrame.from_records(rows, columns=columns), dtypes))
+    if not frames:
+        return _typed(pd.DataFrame(columns=columns), dtypes)
+    return _concat(frames)
+
+
+# Time a statement into telemetry under `label`, with the rows it returned
+# (a DataFrame or a list of rows) and, for a DataFrame, its in-memory size.
+# Failures are recorded and re-raised.
+def execute_recorded(label, execute):
+    started = time.perf_counter()
+    try:
+        result = execute()
+    except Exception:
+        record_query(label, time.perf_counter() - started, error=True)
+        raise
+    seconds = time.perf_counter() - started
+    nbytes = int(result.memory_usage(index=True, deep=True).sum()) if isinstance(result, pd.DataFrame) else None
+    record_query(label, seconds, len(result), nbytes)
+    return result
+
+
+# Run a query on a pooled connection and return the rows as a DataFrame,
+# with the columns named in `dtypes` converted
+def run_query(query, params=None, dtypes=None):
+    pool = get_pool()
+
+    def execute():
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(translate_sql(query, pool.dialect), params or ())
+                return read_frame(cursor, dtypes=dtypes)
+            except pool.errors as e:
+                raise QueryError(str(e)) from e
+            finally:
+                cursor.close()
+
+    return execute_recorded(query_label(query), execute)
+
+
+# Inserting new logs
+
+LOG_COLUMNS = [
+    "stop_date", "stop_time", "country_name", "driver_gender", "driver_age", "driver_race",
+    "violation", "search_conducted", "search_type", "stop_outcome", "is_arrested",
+    "stop_duration", "drugs_related_stop", "vehicle_number",
+]
+
+_insert_hooks = []   # hook(connection, records), runs inside the insert transaction
+_commit_hooks = []   # hook(records), runs once the insert is committed
+
+
+def on_insert(hook):
+    _insert_hooks.append(hook)
+    return hook
+
+
+def after_insert(hook):
+    _commit_hooks.append(hook)
+    return hook
+
+
+def run_insert_hooks(connection, records):
+    for hook in _insert_hooks:
+        hook(connection, records)
+
+
+def run_commit_hooks(records):
+    for hook in _commit_hooks:
+        hook(records)
+
+
+# Writers hold this lock from their first insert until after commit, so log
+# ids become visible in the order they were allocated. Without it a bulk
+# chunk could hold ids 1..50000 uncommitted while another writer commits
+# 50001, and every reader below that skips to "id > 50001" would never see
+# the chunk. SQLite already allows one writer at a time.
+INSERT_LOCK = "securecheck_police_post_logs_insert"
+INSERT_LOCK_TIMEOUT = 120   # seconds to wait for another writer (a bulk chunk) to commit
+
+
+@contextlib.contextmanager
+def insert_lock(connection, dialect):
+    if dialect != "mysql":
+        yield
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute("select get_lock(%s, %s)", (INSERT_LOCK, INSERT_LOCK_TIMEOUT))
+        (acquired,), = cursor.fetchall()
+        if acquired != 1:
+            raise QueryError(f"Timed out after {INSERT_LOCK_TIMEOUT}s waiting for another writer")
+        try:
+            yield
+        finally:
+            cursor.execute("select release_lock(%s)", (INSERT_LOCK,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+# Incremental readers.
+# The metrics summary, the prediction and vehicle indexes, the live tail and
+# the analytics snapshot each remember the highest log id they have folded in
+# and read only rows above it. That relies on insert_lock(): a row committed
+# later never has a lower id than one already read.
+class Watermark:
+
+    def __init__(self, last_id=0):
+        self.last_id = last_id
+
+    # Condition and parameters for rows not read yet
+    def where(self, placeholder, column="id"):
+        return f"{column} > {placeholder}", (self.last_id,)
+
+    def advance(self, max_id):
+        if max_id is not None and max_id == max_id:
+            self.last_id = max(self.last_id, int(max_id))
+
+
+def insert_sql(placeholder):
+    return (f"insert into Police_Post_Logs ({', '.join(LOG_COLUMNS)}) "
+            f"values ({', '.join([placeholder] * len(LOG_COLUMNS))})")
+
+
+# Insert one police log and notify the insert hooks; returns the new id
+def insert_log(record):
+    pool = get_pool()
+    values = [record.get(column) for column in LOG_COLUMNS]
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            with insert_lock(connection, pool.dialect):
+                cursor.execute(insert_sql(pool.placeholder), values)
+                record = dict(record, id=cursor.lastrowid)
+                run_insert_hooks(connection, [record])
+                connection.commit()
+        except pool.errors as e:
+            raise QueryError(str(e)) from e
+        finally:
+            cursor.close()
+    run_commit_hooks([record])
+    return record["id"]
@@ -0,0 +1,208 @@
+import argparse
+import contextlib
+import csv
+import itertools
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from db import (DB_CONFIG, LOG_COLUMNS, QueryError, get_pool, insert_lock, insert_sql, run_commit_hooks,
+                run_insert_hooks)
+
+# Bulk loader for the traffic_stops CSV.
+# The file is read in chunks, cleaned with the same steps as securecheck.ipynb
+# (vectorized), and written with batched inserts or LOAD DATA LOCAL INFILE.
+# Progress is stored in the database in the same transaction as each chunk,
+# so an interrupted load resumes exactly where it stopped.
+#
+#   python ingest.py traffic_stops.csv --method load-data
+
+CHUNK_SIZE = 50000     # CSV rows read, cleaned and committed together
+BATCH_SIZE = 5000      # rows per executemany call, keeps packets under max_allowed_packet
+CHECKPOINT_TABLE = "Police_Post_Logs_Ingest"
+
+FLAG_COLUMNS = ["search_conducted", "is_arrested", "drugs_related_stop"]
+FLAG_VALUES = {"true": 1, "false": 0, "1": 1, "0": 0, "1.0": 1, "0.0": 0}
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y"]
+TIME_FORMATS = ["%H:%M:%S", "%H:%M"]
+
+
+# Parse with explicit formats so pandas never falls back to per-row parsing
+def _parse(series, formats):
+    parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    for value_format in formats:
+        parsed = parsed.fillna(pd.to_datetime(series, format=value_format, errors="coerce"))
+    return parsed
+
+
+def _to_flag(series):
+    return series.str.strip().str.lower().map(FLAG_VALUES).astype("Int64")
+
+
+# Cleaning steps from the notebook, applied to a whole chunk at once
+def clean_chunk(chunk):
+    # Only the ledger columns are loaded, so columns that are entirely NaN
+    # are dropped and missing ones become NULL. reindex() adds missing ones
+    # as float NaN, so everything is made text before the string steps.
+    chunk = chunk.reindex(columns=LOG_COLUMNS).astype("string")
+    chunk["search_type"] = chunk["search_type"].fillna("none")
+    chunk["stop_date"] = _parse(chunk["stop_date"], DATE_FORMATS).dt.date
+    chunk["stop_time"] = _parse(chunk["stop_time"], TIME_FORMATS).dt.time
+    chunk["driver_age"] = pd.to_numeric(chunk["driver_age"], errors="coerce").round().astype("Int64")
+    for column in FLAG_COLUMNS:
+        chunk[column] = _to_flag(chunk[column])
+    return chunk
+
+
+# Driver-ready values: NaN/NaT/NA become None. sqlite3 cannot bind time
+# values, so dates and times are sent as ISO strings there.
+def db_values(chunk, dialect):
+    values = chunk.astype(object).where(chunk.notna(), None)
+    if dialect == "sqlite":
+        for column in ("stop_date", "stop_time"):
+            values[column] = values[column].map(lambda value: value if value is None else value.isoformat())
+    return values
+
+
+# Checkpoints
+
+def _ensure_checkpoint_table(cursor):
+    cursor.execute(f"""create table if not exists {CHECKPOINT_TABLE} (
+                       source VARCHAR(255) PRIMARY KEY,
+                       rows_done BIGINT NOT NULL)""")
+
+
+def _rows_done(cursor, source, p):
+    cursor.execute(f"select rows_done from {CHECKPOINT_TABLE} where source = {p}", (source,))
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute(f"insert into {CHECKPOINT_TABLE} values ({p}, 0)", (source,))
+        return 0
+    return int(row[0])
+
+
+def _save_checkpoint(cursor, source, rows_done, p):
+    cursor.execute(f"update {CHECKPOINT_TABLE} set rows_done = {p} where source = {p}", (rows_done, source))
+
+
+# Writers
+
+def _write_executemany(cursor, values, placeholder, batch_size):
+    sql = insert_sql(placeholder)
+    rows = list(values.itertuples(index=False, name=None))
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(sql, rows[start:start + batch_size])
+
+
+def _write_load_data(cursor, values):
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as handle:
+        values.to_csv(handle, index=False, header=False, na_rep="\\N", lineterminator="\n")
+        path = handle.name
+    try:
+        cursor.execute(f"""load data local infile '{path.replace(os.sep, '/')}'
+                           into table Police_Post_Logs
+                           fields terminated by ',' optionally enclosed by '"'
+                           lines terminated by '\\n'
+                           ({', '.join(LOG_COLUMNS)})""")
+    finally:
+        os.remove(path)
+
+
+# LOAD DATA LOCAL needs a connection opened with allow_local_infile
+@contextlib.contextmanager
+def _ingest_connection(pool, method):
+    if method != "load-data":
+        with pool.connection() as connection:
+            yield connection
+        return
+    if pool.dialect != "mysql":
+        raise QueryError("LOAD DATA LOCAL INFILE needs MySQL; use --method executemany")
+    import mysql.connector
+
+    connection = mysql.connector.connect(**DB_CONFIG, allow_local_infile=True)
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+# A chunked reader positioned after the first `done` data rows. The rows are
+# skipped on the file handle, so resuming deep into a large file costs one
+# pass over the skipped text rather than a set of every skipped row number.
+def _open_reader(handle, done, chunk_size):
+    records = csv.reader(handle)
+    names = next(records)
+    for _ in itertools.islice(records, done):
+        pass
+    return pd.read_csv(handle, dtype=str, chunksize=chunk_size, header=None, names=names)
+
+
+# Load a traffic_stops CSV into Police_Post_Logs; returns rows loaded and rows/sec
+def ingest_csv(path, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, method="executemany",
+               resume=True, progress=print):
+    pool = get_pool()
+    p = pool.placeholder
+    source = os.path.abspath(path)[-255:]
+    loaded = 0
+    started = time.perf_counter()
+    with _ingest_connection(pool, method) as connection:
+        cursor = connection.cursor()
+        try:
+            _ensure_checkpoint_table(cursor)
+            done = _rows_done(cursor, source, p)
+            if not resume:
+                done = 0
+                _save_checkpoint(cursor, source, 0, p)
+            connection.commit()
+            resumed_from = done
+            if done:
+                progress(f"Resuming {path} after {done} rows")
+
+            with open(path, newline="", encoding="utf-8-sig") as handle:
+                reader = _open_reader(handle, done, chunk_size)
+                for chunk in reader:
+                    chunk = clean_chunk(chunk)
+                    values = db_values(chunk, pool.dialect)
+                    with insert_lock(connection, pool.dialect):
+                        if method == "load-data":
+                            _write_load_data(cursor, values)
+                        else:
+                            _write_executemany(cursor, values, p, batch_size)
+                        done += len(chunk)
+                        loaded += len(chunk)
+                        _save_checkpoint(cursor, source, done, p)
+                        records = chunk.to_dict("records")
+                        run_insert_hooks(connection, records)
+                        connection.commit()
+                    run_commit_hooks(records)
+                    elapsed = time.perf_counter() - started
+                    progress(f"{done} rows loaded ({loaded / elapsed:,.0f} rows/sec)")
+        except pool.errors as e:
+            raise QueryError(str(e)) from e
+        finally:
+            cursor.close()
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": loaded,
+        "resumed_from": resumed_from,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(loaded / elapsed, 1) if elapsed else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk load a traffic_stops CSV into Police_Post_Logs")
+    parser.add_argument("csv", help="path to the traffic_stops CSV")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--method", choices=["executemany", "load-data"], default="executemany")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint and load from the top")
+    args = parser.parse_args(argv)
+    stats = ingest_csv(args.csv, args.chunk_size, args.batch_size, args.method, resume=not args.restart)
+    print(f"Loaded {stats['rows']} rows in {stats['seconds']}s ({stats['rows_per_sec']} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import pandas as pd
+
+from cache import cached_query
+from db import LOG_COLUMNS, LOG_DTYPES, QueryError, get_pool
+
+# Paged ledger view for the Home page. Pages are read with keyset pagination:
+# each page starts after the (sort value, id) of the previous page's last row
+# and only the visible rows are sent. With the (column, id) index for the sort
+# order, an unfiltered page reads about page_size rows however deep it is;
+# a filter on another column reads past the rows it rejects.
+
+LEDGER_COLUMNS = ["id"] + LOG_COLUMNS
+# Sort orders with a (column, id) index (schema.py migration 2), so a page is
+# read in index order from the cursor; other columns would sort the whole table
+SORT_COLUMNS = ["id", "stop_date", "stop_time", "country_name", "driver_age", "violation", "stop_outcome"]
+FILTER_COLUMNS = ["country_name", "driver_gender", "violation", "stop_outcome", "stop_duration"]
+PAGE_SIZES = [25, 50, 100, 250]
+PAGE_TTL = 60
+
+
+def _check_column(column):
+    if column not in LEDGER_COLUMNS:
+        raise QueryError(f"Unknown ledger column: {column}")
+    return column
+
+
+def _plain(value):
+    if value is None or (not isinstance(value, (list, tuple)) and pd.isna(value)):
+        return None
+    # Typed frames hold stop_date/stop_time as Timestamp/Timedelta; both
+    # databases compare the ISO text forms against DATE and TIME columns
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d") if value == value.normalize() else value.isoformat(sep=" ")
+    if isinstance(value, pd.Timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return value.item() if hasattr(value, "item") else value
+
+
+# Rows that come after the cursor in (sort, id) order. NULLs sort first
+# ascending and last descending, in MySQL and SQLite alike.
+def _after_clause(sort, descending, cursor, p):
+    value, last_id = cursor
+    if sort == "id":
+        return f"id {'<' if descending else '>'} {p}", [last_id]
+    if descending:
+        if value is None:
+            return f"({sort} is null and id < {p})", [last_id]
+        return (f"({sort} < {p} or ({sort} = {p} and id < {p}) or {sort} is null)",
+                [value, value, last_id])
+    if value is None:
+        return f"(({sort} is null and id > {p}) or {sort} is not null)", [last_id]
+    return f"({sort} > {p} or ({sort} = {p} and id > {p}))", [value, value, last_id]
+
+
+# One page of the ledger and the cursor for the next page (None on the last page)
+def fetch_page(columns=None, sort="id", descending=True, filters=None, after=None,
+               page_size=PAGE_SIZES[1], loader=cached_query):
+    p = get_pool().placeholder
+    columns = [_check_column(column) for column in (columns or LEDGER_COLUMNS)]
+    if sort not in SORT_COLUMNS:
+        raise QueryError(f"The ledger cannot be sorted by {sort}")
+    selected = columns + [column for column in (sort, "id") if column not in columns]
+
+    where, params = [], []
+    for column, value in (filters or {}).items():
+        where.append(f"{_check_column(column)} = {p}")
+        params.append(value)
+    if after is not None:
+        clause, clause_params = _after_clause(sort, descending, after, p)
+        where.append(clause)
+        params.extend(clause_params)
+
+    direction = "desc" if descending else "asc"
+    order = "id " + direction if sort == "id" else f"{sort} {direction}, id {direction}"
+    query = f"select {', '.join(selected)} from Police_Post_Logs"
+    if where:
+        query += " where " + " and ".join(where)
+    query += f" order by {order} limit {int(page_size) + 1}"
+
+    data = loader(query, tuple(params), ttl=PAGE_TTL, dtypes=LOG_DTYPES)
+    next_cursor = None
+    if len(data) > page_size:
+        data = data.iloc[:page_size]
+        last = data.iloc[-1]
+        next_cursor = (_plain(last[sort]), _plain(last["id"]))
+    return data[columns].reset_index(drop=True), next_cursor
+
+
+# Values offered in the Home page filters
+def filter_options(column, loader=cached_query):
+    column = _check_column(column)
+    data = loader(f"select distinct {column} from Police_Post_Logs where {column} is not null "
+                  f"order by {column}", ttl=600)
+    return data[column].tolist()
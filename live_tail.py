@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import deque
+
+from db import LOG_COLUMNS, LOG_DTYPES, Watermark, after_insert, get_pool, run_query
+from metrics import METRIC_COLUMNS, metric_deltas, read_summary
+from telemetry import status_source
+
+# Live tail of new police logs.
+# One poller thread per process asks the database only for rows with an id
+# above the last one it has seen and keeps them in a ring buffer, along with
+# running Quick Metrics totals. Every dashboard reads from that buffer, so
+# the database sees one small primary-key range query per interval no matter
+# how many dashboards are open. The poller stops when nobody has read for a
+# while and starts again on the next read.
+
+POLL_SECONDS = 2        # default refresh interval
+BUFFER_SIZE = 1000      # newest rows kept in memory
+POLL_BATCH = 500        # rows fetched per poll; a full batch polls again straight away
+IDLE_SECONDS = 60       # stop polling when no dashboard has read for this long
+READ_LIMIT = 200        # most rows handed to one dashboard per read
+
+TAIL_COLUMNS = ", ".join(["id"] + LOG_COLUMNS)
+
+
+class LiveTail:
+
+    def __init__(self, interval=POLL_SECONDS, buffer_size=BUFFER_SIZE, batch=POLL_BATCH,
+                 idle_seconds=IDLE_SECONDS, loader=run_query):
+        self.interval = interval
+        self.batch = batch
+        self.idle_seconds = idle_seconds
+        self._loader = loader
+        self._rows = deque(maxlen=buffer_size)
+        self.watermark = None      # set once primed
+        self.metrics = None
+        self._last_read = time.monotonic()
+        self._lock = threading.Lock()
+        self._prime_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.stats = {"polls": 0, "rows": 0, "errors": 0, "starts": 0}
+
+    # Load the newest rows and the metrics as of the same id, so polling
+    # forward from there neither skips nor double counts a row
+    def _prime(self):
+        metrics, as_of = read_summary()
+        p = get_pool().placeholder
+        data = self._loader(f"select {TAIL_COLUMNS} from Police_Post_Logs where id <= {p} "
+                            f"order by id desc limit {self._rows.maxlen}", (as_of,), dtypes=LOG_DTYPES)
+        with self._lock:
+            self._rows.extend(reversed(data.to_dict("records")))
+            self.metrics = metrics
+            self.watermark = Watermark(as_of)
+
+    @property
+    def last_id(self):
+        return None if self.watermark is None else self.watermark.last_id
+
+    def _poll(self):
+        new_rows, params = self.watermark.where(get_pool().placeholder)
+        data = self._loader(f"select {TAIL_COLUMNS} from Police_Post_Logs where {new_rows} "
+                            f"order by id limit {self.batch}", params, dtypes=LOG_DTYPES)
+        records = data.to_dict("records")
+        with self._lock:
+            self.stats["polls"] += 1
+            if records:
+                self._rows.extend(records)
+                for column, delta in metric_deltas(records).items():
+                    self.metrics[column] += delta
+                self.watermark.advance(records[-1]["id"])
+                self.stats["rows"] += len(records)
+        return len(records)
+
+    def _ensure_primed(self):
+        with self._prime_lock:
+            if self.last_id is None:
+                self._prime()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if time.monotonic() - self._last_read >= self.idle_seconds:
+                    self._thread = None
+                    return
+            try:
+                self._ensure_primed()
+                fetched = self._poll()
+            except Exception:
+                with self._lock:
+                    self.stats["errors"] += 1
+                fetched = 0
+            if fetched < self.batch:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+
+    def _ensure_running(self):
+        with self._lock:
+            self._last_read = time.monotonic()
+            if self._thread is not None:
+                return
+            self.stats["starts"] += 1
+            self._thread = threading.Thread(target=self._run, name="securecheck-live-tail", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    # Rows newer than `after_id` (all buffered rows for None), the current
+    # totals, and whether rows were skipped because this reader fell behind
+    def read(self, after_id=None, limit=READ_LIMIT):
+        self._ensure_running()
+        self._ensure_primed()
+        with self._lock:
+            rows = []
+            for row in reversed(self._rows):
+                if after_id is not None and row["id"] <= after_id:
+                    break
+                rows.append(row)
+            rows.reverse()
+            # A first read (after_id None) just shows the newest rows; only a
+            # reader that has seen rows before can have missed some
+            gap = after_id is not None and (
+                len(rows) > limit
+                or (len(self._rows) == self._rows.maxlen and after_id < self._rows[0]["id"] - 1))
+            metrics = dict(self.metrics) if self.metrics is not None else dict.fromkeys(METRIC_COLUMNS, 0)
+            return rows[-limit:], metrics, gap
+
+    def status(self):
+        with self._lock:
+            status = dict(self.stats)
+            status.update(running=self._thread is not None, buffered=len(self._rows), last_id=self.last_id)
+        return status
+
+
+# Process-wide tail shared by every dashboard
+
+live_tail = LiveTail()
+
+
+@status_source("live_tail")
+def _live_tail_status():
+    return live_tail.status()
+
+
+# Poll straight away after inserts made in this process
+@after_insert
+def _wake_on_insert(records):
+    live_tail.wake()
@@ -0,0 +1,142 @@
+import threading
+
+from db import QueryError, Watermark, execute_recorded, get_pool, on_insert
+from telemetry import query_label
+
+# Quick Metrics counters kept in a one-row summary table.
+# The summary remembers the last log id it has counted, so keeping it current
+# only ever reads the rows inserted since then (a primary-key range scan).
+
+SUMMARY_TABLE = "Police_Post_Logs_Summary"
+
+METRIC_COLUMNS = ["total_stops", "total_arrests", "total_warnings", "drug_related_stops"]
+
+# Same rules the dashboard used in pandas: stop_outcome contains "arrest" /
+# "warning" (case-insensitive), drugs_related_stop == 1
+AGGREGATE_SQL = """select count(*) as total_stops,
+                   coalesce(sum(case when instr(lower(stop_outcome), 'arrest') > 0 then 1 else 0 end), 0) as total_arrests,
+                   coalesce(sum(case when instr(lower(stop_outcome), 'warning') > 0 then 1 else 0 end), 0) as total_warnings,
+                   coalesce(sum(case when drugs_related_stop = 1 then 1 else 0 end), 0) as drug_related_stops,
+                   max(id) as last_log_id
+                   from Police_Post_Logs
+                   where {new_rows}"""
+
+_ready = False
+_ready_lock = threading.Lock()
+
+
+# Rows for a select; [] for statements with no result set, which
+# mysql.connector refuses to fetch from
+def _execute(cursor, sql, params=()):
+    def execute():
+        cursor.execute(sql, params)
+        if cursor.description is None:
+            return []
+        return cursor.fetchall()
+
+    return execute_recorded(query_label(sql), execute)
+
+
+# Create the summary table and its single row; the first catch-up backfills it
+def ensure_summary_table(connection):
+    global _ready
+    with _ready_lock:
+        if _ready:
+            return
+        pool = get_pool()
+        p = pool.placeholder
+        cursor = connection.cursor()
+        try:
+            _execute(cursor, f"""create table if not exists {SUMMARY_TABLE} (
+                                 id INT PRIMARY KEY,
+                                 total_stops BIGINT NOT NULL,
+                                 total_arrests BIGINT NOT NULL,
+                                 total_warnings BIGINT NOT NULL,
+                                 drug_related_stops BIGINT NOT NULL,
+                                 last_log_id BIGINT NOT NULL)""")
+            if not _execute(cursor, f"select id from {SUMMARY_TABLE} where id = 1"):
+                _execute(cursor, f"insert into {SUMMARY_TABLE} values ({p}, 0, 0, 0, 0, 0)", (1,))
+            connection.commit()
+        finally:
+            cursor.close()
+        _ready = True
+
+
+# Add the rows inserted since the last catch-up to the summary row.
+# Runs on the caller's connection and does not commit.
+def catch_up(connection):
+    pool = get_pool()
+    p = pool.placeholder
+    cursor = connection.cursor()
+    try:
+        lock = " for update" if pool.dialect == "mysql" else ""
+        (last_log_id,), = _execute(cursor, f"select last_log_id from {SUMMARY_TABLE} where id = 1{lock}")
+        new_rows, params = Watermark(last_log_id).where(p)
+        row = _execute(cursor, AGGREGATE_SQL.format(new_rows=new_rows), params)[0]
+        if not row[0]:
+            return
+        _execute(cursor, f"""update {SUMMARY_TABLE} set
+                             total_stops = total_stops + {p},
+                             total_arrests = total_arrests + {p},
+                             total_warnings = total_warnings + {p},
+                             drug_related_stops = drug_related_stops + {p},
+                             last_log_id = {p}
+                             where id = 1""", tuple(int(value) for value in row))
+    finally:
+        cursor.close()
+
+
+# Keep the summary in step with inserts made through db.insert_log, inside
+# the same transaction. Until the table exists the next read catches up instead.
+@on_insert
+def _count_new_logs(connection, records):
+    if _ready:
+        catch_up(connection)
+
+
+# Quick Metrics and the last log id they include, read from the summary row
+def read_summary():
+    pool = get_pool()
+    with pool.connection() as connection:
+        try:
+            ensure_summary_table(connection)
+            cursor = connection.cursor()
+            try:
+                (last_log_id,), = _execute(cursor, f"select last_log_id from {SUMMARY_TABLE} where id = 1")
+                (latest_id,), = _execute(cursor, "select max(id) from Police_Post_Logs")
+                if latest_id is not None and latest_id > last_log_id:
+                    catch_up(connection)
+                    connection.commit()
+                row = _execute(cursor, f"select {', '.join(METRIC_COLUMNS)}, last_log_id "
+                                       f"from {SUMMARY_TABLE} where id = 1")[0]
+            finally:
+                cursor.close()
+        except pool.errors as e:
+            raise QueryError(str(e)) from e
+    values = [int(value) for value in row]
+    return dict(zip(METRIC_COLUMNS, values)), values[-1]
+
+
+# Total stops, arrests, warnings and drug related stops
+def quick_metrics():
+    return read_summary()[0]
+
+
+def _is_one(value):
+    try:
+        return int(value) == 1
+    except (TypeError, ValueError):
+        return False   # None, NaN or pandas' NA
+
+
+# Counter increments for new log rows, by the same rules as AGGREGATE_SQL
+def metric_deltas(records):
+    deltas = dict.fromkeys(METRIC_COLUMNS, 0)
+    for record in records:
+        outcome = record.get("stop_outcome")
+        outcome = outcome.lower() if isinstance(outcome, str) else ""
+        deltas["total_stops"] += 1
+        deltas["total_arrests"] += "arrest" in outcome
+        deltas["total_warnings"] += "warning" in outcome
+        deltas["drug_related_stops"] += _is_one(record.get("drugs_related_stop"))
+    return deltas
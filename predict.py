@@ -0,0 +1,297 @@
+import argparse
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from db import Watermark, after_insert, get_pool, run_query
+
+# Stop outcome / violation predictor for the "Predict Logs" page.
+# Instead of filtering the whole ledger on every submit, a lookup index holds
+# the outcome and violation counts for every combination of the five form
+# keys. When an exact combination has no history the index backs off to
+# coarser combinations, down to the ledger as a whole.
+#
+# Whole files of pending stops can be scored in bulk from the command line:
+#
+#   python predict.py pending_stops.csv predictions.csv --workers 4
+
+KEY_COLUMNS = ["driver_gender", "driver_age", "search_conducted", "stop_duration", "drugs_related_stop"]
+TARGETS = ["stop_outcome", "violation"]
+
+# Key sets tried in order; "age_group" is driver_age rounded down to its decade
+BACKOFF_LEVELS = [
+    ("driver_gender", "driver_age", "search_conducted", "stop_duration", "drugs_related_stop"),
+    ("driver_gender", "age_group", "search_conducted", "stop_duration", "drugs_related_stop"),
+    ("driver_gender", "search_conducted", "stop_duration", "drugs_related_stop"),
+    ("search_conducted", "stop_duration", "drugs_related_stop"),
+    ("search_conducted", "drugs_related_stop"),
+    (),
+]
+
+INT_KEYS = ["driver_age", "age_group", "search_conducted", "drugs_related_stop"]
+TEXT_KEYS = ["driver_gender", "stop_duration"]
+
+DEFAULT_PREDICTION = {"stop_outcome": "Warning", "violation": "Speeding"}
+REFRESH_SECONDS = 5    # how often to look for rows inserted by other processes
+CHUNK_SIZE = 100000    # rows per batch when scoring a CSV
+
+GROUP_SQL = """select driver_gender, driver_age, search_conducted, stop_duration, drugs_related_stop,
+               stop_outcome, violation, count(*) as stops, max(id) as last_id
+               from Police_Post_Logs
+               where {new_rows}
+               group by driver_gender, driver_age, search_conducted, stop_duration, drugs_related_stop,
+               stop_outcome, violation"""
+
+
+def _as_int(value):
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return int(value.strip().lower() == "true")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# None for missing values, including pandas' NaN
+def _as_text(value):
+    return None if value is None or value != value else value
+
+
+# Form and database values in one shape, so "1" and 1 match the same key
+def normalize(record):
+    age = _as_int(record.get("driver_age"))
+    return {
+        "driver_gender": _as_text(record.get("driver_gender")),
+        "driver_age": age,
+        "age_group": None if age is None else age // 10 * 10,
+        "search_conducted": _as_int(record.get("search_conducted")),
+        "stop_duration": _as_text(record.get("stop_duration")),
+        "drugs_related_stop": _as_int(record.get("drugs_related_stop")),
+    }
+
+
+# Vectorized normalize(): key columns with one dtype on both sides of the joins
+def _typed_keys(frame):
+    frame = frame.copy()
+    for column in INT_KEYS:
+        if column in frame:
+            values = frame[column].astype("string").str.strip().str.lower().replace({"true": "1", "false": "0"})
+            frame[column] = pd.to_numeric(values, errors="coerce").astype("Float64").floordiv(1).astype("Int64")
+    for column in TEXT_KEYS:
+        if column in frame:
+            frame[column] = frame[column].astype("string")
+    return frame
+
+
+def normalize_frame(stops):
+    keys = stops.reindex(columns=KEY_COLUMNS)
+    keys["age_group"] = pd.to_numeric(keys["driver_age"].astype("string"), errors="coerce") // 10 * 10
+    return _typed_keys(keys)
+
+
+# Most common value; ties go to the smallest value like pandas' Series.mode()
+def _mode(counts):
+    best = max(counts.values())
+    return min(value for value, count in counts.items() if count == best)
+
+
+class PredictionIndex:
+
+    def __init__(self, loader=run_query, refresh_seconds=REFRESH_SECONDS):
+        self._loader = loader
+        self.refresh_seconds = refresh_seconds
+        # level -> key tuple -> {"stops": n, "stop_outcome": Counter, "violation": Counter,
+        #                        "prediction": (stop_outcome, violation, stops) or None}
+        self._levels = [{} for _ in BACKOFF_LEVELS]
+        self.watermark = Watermark()
+        self._refreshed = 0.0
+        self._lock = threading.Lock()
+
+    # Number of distinct exact key combinations indexed
+    def __len__(self):
+        return len(self._levels[0])
+
+    def _add(self, keys, outcome, violation, stops, touched):
+        for level, columns in enumerate(BACKOFF_LEVELS):
+            key = tuple(keys[column] for column in columns)
+            entry = self._levels[level].get(key)
+            if entry is None:
+                entry = {"stops": 0, "stop_outcome": Counter(), "violation": Counter(), "prediction": None}
+                self._levels[level][key] = entry
+            touched[id(entry)] = entry
+            entry["stops"] += stops
+            if outcome is not None:
+                entry["stop_outcome"][outcome] += stops
+            if violation is not None:
+                entry["violation"][violation] += stops
+
+    # Fold in every row with an id above the last one indexed
+    def refresh(self):
+        with self._lock:
+            new_rows, params = self.watermark.where(get_pool().placeholder)
+            data = self._loader(GROUP_SQL.format(new_rows=new_rows), params)
+            touched = {}
+            for row in data.itertuples(index=False):
+                keys = normalize(row._asdict())
+                self._add(keys, _as_text(row.stop_outcome), _as_text(row.violation), int(row.stops), touched)
+            # Modes are worked out here, under the lock, so predict() never
+            # iterates a Counter that a refresh on another thread is changing
+            for entry in touched.values():
+                if entry["stop_outcome"] and entry["violation"]:
+                    entry["prediction"] = (_mode(entry["stop_outcome"]), _mode(entry["violation"]), entry["stops"])
+            if len(data):
+                self.watermark.advance(data["last_id"].max())
+            self._refreshed = time.monotonic()
+
+    def refresh_if_stale(self):
+        if time.monotonic() - self._refreshed >= self.refresh_seconds:
+            self.refresh()
+
+    # Predicted stop_outcome and violation, with the key set and number of stops behind it
+    def predict(self, record):
+        keys = normalize(record)
+        for level, columns in enumerate(BACKOFF_LEVELS):
+            entry = self._levels[level].get(tuple(keys[column] for column in columns))
+            prediction = entry and entry["prediction"]
+            if prediction:
+                outcome, violation, stops = prediction
+                return {
+                    "stop_outcome": outcome,
+                    "violation": violation,
+                    "matched_on": list(columns),
+                    "support": stops,
+                }
+        return dict(DEFAULT_PREDICTION, matched_on=None, support=0)
+
+    # The index as one DataFrame per backoff level (keys, predictions, support),
+    # for scoring many stops with joins
+    def lookup_frames(self):
+        frames = []
+        with self._lock:
+            for level, columns in enumerate(BACKOFF_LEVELS):
+                rows = [key + entry["prediction"] for key, entry in self._levels[level].items()
+                        if entry["prediction"]]
+                frame = pd.DataFrame(rows, columns=list(columns) + TARGETS + ["support"])
+                frames.append((columns, _typed_keys(frame)))
+        return frames
+
+
+# Process-wide index, built on first use and kept current after that
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PredictionIndex()
+            _index.refresh()
+        return _index
+
+
+@after_insert
+def _refresh_on_insert(records):
+    if _index is not None:
+        _index.refresh()
+
+
+def predict(record):
+    index = get_index()
+    index.refresh_if_stale()
+    return index.predict(record)
+
+
+# Batch prediction
+
+# Predicted stop_outcome and violation for every row of `stops`, resolved a
+# backoff level at a time with one join per level instead of per-row filters
+def predict_frame(stops, frames=None):
+    frames = get_index().lookup_frames() if frames is None else frames
+    stops = stops.reset_index(drop=True)
+    pending = normalize_frame(stops).rename_axis("row")
+    result = pd.DataFrame({
+        "predicted_stop_outcome": DEFAULT_PREDICTION["stop_outcome"],
+        "predicted_violation": DEFAULT_PREDICTION["violation"],
+        "matched_on": None,
+        "support": 0,
+    }, index=stops.index)
+    for columns, frame in frames:
+        if pending.empty or frame.empty:
+            continue
+        if columns:
+            matched = pending[list(columns)].reset_index().merge(frame, on=list(columns)).set_index("row")
+        else:
+            matched = pd.DataFrame({column: frame[column].iloc[0] for column in TARGETS + ["support"]},
+                                   index=pending.index)
+        result.loc[matched.index, "predicted_stop_outcome"] = matched["stop_outcome"]
+        result.loc[matched.index, "predicted_violation"] = matched["violation"]
+        result.loc[matched.index, "matched_on"] = "+".join(columns) or "all"
+        result.loc[matched.index, "support"] = matched["support"]
+        pending = pending.drop(matched.index)
+    return pd.concat([stops, result], axis=1)
+
+
+# Each worker process gets the lookup frames once, not with every chunk
+_worker_frames = None
+
+
+def _init_worker(frames):
+    global _worker_frames
+    _worker_frames = frames
+
+
+def _predict_chunk(chunk):
+    return predict_frame(chunk, _worker_frames)
+
+
+# Score an iterable of DataFrame chunks, yielding results in input order.
+# At most two chunks per worker are in flight, so memory stays bounded.
+def predict_chunks(chunks, workers=None, frames=None):
+    frames = get_index().lookup_frames() if frames is None else frames
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            yield predict_frame(chunk, frames)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(frames,)) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(_predict_chunk, chunk))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+# Score a CSV of pending stops and stream the predictions to another CSV
+def predict_csv(path, output, chunk_size=CHUNK_SIZE, workers=None, progress=print):
+    started = time.perf_counter()
+    rows = 0
+    chunks = pd.read_csv(path, dtype=str, chunksize=chunk_size)
+    with open(output, "w", newline="", encoding="utf-8") as handle:
+        for result in predict_chunks(chunks, workers):
+            result.to_csv(handle, index=False, header=rows == 0)
+            rows += len(result)
+            progress(f"{rows} stops scored ({rows / (time.perf_counter() - started):,.0f} rows/sec)")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict stop_outcome and violation for a CSV of stops")
+    parser.add_argument("csv", help="CSV with driver_gender, driver_age, search_conducted, stop_duration, drugs_related_stop")
+    parser.add_argument("output", help="where to write the CSV with predictions")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    rows = predict_csv(args.csv, args.output, args.chunk_size, args.workers)
+    print(f"Wrote predictions for {rows} stops to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
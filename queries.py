@@ -0,0 +1,158 @@
+# Canned SQL for the "View Logs" Advanced Insights page
+
+query_map={
+            "Top 10 vehicle_number involved in drug_related stops": "select vehicle_number from Police_Post_Logs where drugs_related_stop=1 order by vehicle_number desc limit 10",
+            "Most frequently searched vehicle":"select vehicle_number, count(*) as count from Police_Post_Logs where search_conducted=1 group by vehicle_number order by count desc limit 1",
+            "Driver age group had the highest arrest rate" : """select case
+                                                            when driver_age between 18 and 25 then '18-25'
+                                                            when driver_age between 26 and 35 then '26-35'
+                                                            when driver_age between 36 and 45 then '36-45'
+                                                            when driver_age between 45 and 60 then '45-60'
+                                                            else '60+'
+                                                            end as age_group,count(*) as total_driver,
+                                                            sum(case when is_arrested=1 then 1 else 0 end) as total_arrests,
+                                                            round(sum(case when is_arrested=1 then 1 else 0 end)*100.0/count(*),2) as arrest_rate_percent 
+                                                            from Police_Post_Logs group by age_group
+                                                            order by arrest_rate_percent desc limit 1""",
+            "Gender Distribution of Drivers stopped in each Country" :"""select country_name,driver_gender,count(*) as total_gender,
+                                                                        ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (PARTITION BY country_name), 2) AS gender_percent
+                                                                        from Police_Post_Logs
+                                                                        group by country_name,driver_gender
+                                                                        order by country_name, driver_gender
+                                                                        """,
+            "Time of day sees the most traffic stops" : """select extract(hour from stop_time) as hour_of_day, count(*) as total_stops
+                                                                        from Police_Post_Logs
+                                                                        group by extract(hour from stop_time)
+                                                                        order by total_stops desc
+                                                                        limit 1""",
+            "Average stop duration for different violations" :"""select violation, avg(stop_duration) as Average_of_stop_duration
+                                                                from Police_Post_Logs
+                                                                group by violation
+                                                                order by violation
+                                                                desc""" ,
+            "Highest search rate of race and gender combination": """select driver_race,driver_gender, count(*) as total_gender,
+                                                                    round(100.0* count(*)/ sum(count(*)) over (partition by driver_race),2) as gender_percent
+                                                                    from Police_Post_Logs
+                                                                    group by driver_race, driver_gender
+                                                                    order by driver_race
+                                                                    desc limit 2""",
+            "Stops are during the night more likely to lead to arrests":"""select case
+                                                                        when extract(hour from stop_time) between 20 and 23 or extract(hour from stop_time) between 0 and 5 then 'Night'
+                                                                        else 'Day'
+                                                                        end as time_of_day,
+                                                                        count(*) as total_stops,
+                                                                        sum(case when is_arrested=1 then 1 else 0 end) as total_arrests
+                                                                        from Police_Post_Logs
+                                                                        group by time_of_day
+                                                                        order by time_of_day""",
+            "Which violations are most associated with searches or arrests":"""select violation,count(*) as total_stops,
+                                                                         sum(case when is_arrested=1 then 1 else 0 end) as total_arrests
+                                                                         from Police_Post_Logs
+                                                                         group by violation
+                                                                         order by total_arrests
+                                                                         desc limit 1""",
+            "Which violations are most common among younger drivers (<25)" : """select violation,count(*) as total_stops,
+                                                                        sum(case when driver_age <25 then 1 else 0 end) as number_of_driver_under_25
+                                                                        from Police_Post_Logs
+                                                                        group by violation
+                                                                        order by number_of_driver_under_25
+                                                                        desc limit 1""",
+            "Is there a violation that rarely results in search or arrest": """select violation,count(*) as total_stops,
+                                                                        sum(case when is_arrested=1 then 1 else 0 end) as total_arrests
+                                                                         from Police_Post_Logs
+                                                                         group by violation
+                                                                         order by total_arrests
+                                                                        asc limit 1
+                                                                        """,
+            "Which countries report the highest rate of drug-related stops":"""select country_name, count(*) as total_stops,
+                                                                            sum(case when drugs_related_stop=1 then 1 else 0 end) as total_drug_related_stop,
+                                                                            ROUND(100.0 * sum(case when drugs_related_stop=1 then 1 else 0 end)/ COUNT(*), 2) AS drug_stop_rate_percent
+                                                                            from Police_Post_Logs
+                                                                            group by country_name
+                                                                            order by drug_stop_rate_percent
+                                                                            desc limit 1""",
+            "What is the arrest rate by country and violation": """ select country_name,count(*) as total_stops, violation,
+                                                                    sum(case when is_arrested=1 then 1 else 0 end) as total_arrests,
+                                                                    round(100.0*sum(case when is_arrested=1 then 1 else 0 end)/count(*),2) as total_arrest_percent
+                                                                    from Police_Post_Logs
+                                                                    group by country_name, violation
+                                                                    order by country_name""",
+            "Which country has the most stops with search conducted":"""select country_name, count(*) as total_stops
+                                                                    from Police_Post_Logs 
+                                                                    group by country_name
+                                                                    order by total_stops
+                                                                    desc limit 1""",
+            "Yearly Breakdown of Stops and Arrests by Country " : """select year,country_name,total_stops,total_arrests
+                                                                    from(select year,country_name,total_stops,total_arrests,
+                                                                    sum(total_stops) over (partition by year) as yearly_total_stops,
+                                                                    sum(total_arrests) over (partition by year) as yearly_total_arrests
+                                                                    from 
+                                                                    (select extract(year from stop_date) as year,country_name,count(*) as total_stops,
+                                                                    sum(case when is_arrested=1 then 1 else 0 end)as total_arrests
+                                                                    from Police_Post_Logs
+                                                                    group by extract(year from stop_date), country_name) as agg_data
+                                                                    ) as base_data
+                                                                    order by year,country_name"""  ,
+            "Driver Violation Trends Based on Age and Race" :  """select driver_age,driver_race,violation,count(*) as total_violation
+                                                                  from
+                                                                  (select case
+                                                                   WHEN driver_age < 20 THEN '<20'
+                                                                   WHEN driver_age BETWEEN 20 AND 29 THEN '20-29'
+                                                                   WHEN driver_age BETWEEN 30 AND 39 THEN '30-39'
+                                                                   WHEN driver_age BETWEEN 40 AND 49 THEN '40-49'
+                                                                   WHEN driver_age >= 50 THEN '50+'
+                                                                   END AS driver_age, driver_race,violation
+                                                                   FROM Police_Post_Logs) AS grouped_data
+                                                                   GROUP BY driver_age, driver_race, violation
+                                                                   ORDER BY driver_age,driver_race, violation""",
+            "Number of Stops by Year,Month, Hour of the Day": """select extract(year from stop_date) as year,
+                                                                 extract(month from stop_date) as month,
+                                                                 extract(hour from stop_time) as hour,
+                                                                 count(*) as total_stops
+                                                                 from Police_Post_Logs
+                                                                 group by 
+                                                                 extract(year from stop_date),
+                                                                 extract(month from stop_date),
+                                                                 extract(hour from stop_time)
+                                                                 order by year,month,hour""" ,
+            "Violations with High Search and Arrest Rates"  : """SELECT violation,total_stops,total_arrests,
+                                                                 ROUND(100.0 * total_arrests / NULLIF(total_stops, 0), 2) AS arrest_rate_percent,
+                                                                 RANK() OVER (ORDER BY ROUND(100.0 * total_arrests / NULLIF(total_stops, 0), 2) DESC) AS arrest_rate_rank
+                                                                 from 
+                                                                 (SELECT violation,COUNT(*) AS total_stops,
+                                                                  COUNT(CASE WHEN is_arrested = 1 THEN 1 END) AS total_arrests
+                                                                  FROM Police_Post_Logs
+                                                                  GROUP BY violation
+                                                                  ) AS agg
+                                                                  ORDER BY arrest_rate_percent DESC
+                                                                  """,
+            "Driver Demographics by Country (Age, Gender, and Race)":""" SELECT country_name,driver_gender,driver_race,
+                                                                    CASE 
+                                                                    WHEN driver_age < 20 THEN '<20'
+                                                                    WHEN driver_age BETWEEN 20 AND 29 THEN '20-29'
+                                                                    WHEN driver_age BETWEEN 30 AND 39 THEN '30-39'
+                                                                    WHEN driver_age BETWEEN 40 AND 49 THEN '40-49'
+                                                                    WHEN driver_age BETWEEN 50 AND 59 THEN '50-59'
+                                                                    ELSE '60+'
+                                                                    END AS age_group,
+                                                                    COUNT(*) AS total_drivers
+                                                                    FROM Police_Post_Logs
+                                                                    GROUP BY 
+                                                                    country_name,driver_gender,driver_race, 
+                                                                    CASE 
+                                                                    WHEN driver_age < 20 THEN '<20'
+                                                                    WHEN driver_age BETWEEN 20 AND 29 THEN '20-29'
+                                                                    WHEN driver_age BETWEEN 30 AND 39 THEN '30-39'
+                                                                    WHEN driver_age BETWEEN 40 AND 49 THEN '40-49'
+                                                                    WHEN driver_age BETWEEN 50 AND 59 THEN '50-59'
+                                                                    ELSE '60+'
+                                                                    END 
+                                                                    ORDER BY country_name, driver_gender, driver_race, age_group"""  ,
+                                                                     
+            "Top 5 Violations with Highest Arrest Rates" : """ select violation, count(*) as total_stops,
+                                                               count(case when is_arrested=1 then 1 end) as total_arrests,
+                                                               round(100.0*count(case when is_arrested=1 then 1 end)/nullif(count(*),0),2)as arrest_rate_percent
+                                                               from Police_Post_Logs
+                                                               group by violation
+                                                               order by arrest_rate_percent desc
+                                                               limit 5"""   }
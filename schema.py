@@ -0,0 +1,194 @@
+import argparse
+import json
+import sys
+
+from db import QueryError, get_pool, run_query
+from queries import query_map
+
+# Schema migrations for Police_Post_Logs and an EXPLAIN check for query_map.
+#
+#   python schema.py migrate                      apply pending migrations
+#   python schema.py status                       list applied migrations
+#   python schema.py explain                      fail if a canned query reads every table row
+#                                                 (type ALL); full index scans (type index) pass
+#   python schema.py explain --write-baseline plans.json
+#   python schema.py explain --baseline plans.json
+#                                                 also fail if any access type got worse
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+# (version, description, statements). Applied in order, each version once.
+# The canned queries also run on SQLite and on the DuckDB snapshot, so they
+# keep grouping by extract(...) and their own CASE buckets; the indexes are
+# on the raw columns those expressions read.
+MIGRATIONS = [
+    (1, "covering and composite indexes for the query_map access paths", [
+        # violation rankings, arrest/search rates, average duration, under-25 counts
+        """create index idx_violation_outcomes on Police_Post_Logs
+           (violation, is_arrested, search_conducted, driver_age, stop_duration)""",
+        # gender per country, demographics by country
+        """create index idx_country_demographics on Police_Post_Logs
+           (country_name, driver_gender, driver_race, driver_age)""",
+        # arrest rate by country and violation, drug stop rate, searches per country
+        """create index idx_country_violation on Police_Post_Logs
+           (country_name, violation, is_arrested, drugs_related_stop, search_conducted)""",
+        # race and gender combinations, age and race trends
+        """create index idx_race_gender on Police_Post_Logs
+           (driver_race, driver_gender, driver_age, violation)""",
+        # vehicle lookups
+        "create index idx_drug_vehicles on Police_Post_Logs (drugs_related_stop, vehicle_number)",
+        """create index idx_vehicle_activity on Police_Post_Logs
+           (vehicle_number, search_conducted, is_arrested, drugs_related_stop)""",
+        # time of day and yearly breakdowns
+        "create index idx_stop_when on Police_Post_Logs (stop_date, stop_time, country_name, is_arrested)",
+        # stop outcome prediction index build
+        """create index idx_prediction_keys on Police_Post_Logs
+           (driver_gender, driver_age, search_conducted, stop_duration, drugs_related_stop, stop_outcome, violation)""",
+    ]),
+    # The Home ledger pages in (column, id) order and continues after the last
+    # (value, id) it showed, so each sort order needs an index led by exactly those two
+    (2, "(column, id) indexes for the Home ledger's sort orders", [
+        "create index idx_ledger_stop_date on Police_Post_Logs (stop_date, id)",
+        "create index idx_ledger_stop_time on Police_Post_Logs (stop_time, id)",
+        "create index idx_ledger_country on Police_Post_Logs (country_name, id)",
+        "create index idx_ledger_driver_age on Police_Post_Logs (driver_age, id)",
+        "create index idx_ledger_violation on Police_Post_Logs (violation, id)",
+        "create index idx_ledger_stop_outcome on Police_Post_Logs (stop_outcome, id)",
+    ]),
+]
+
+# MySQL EXPLAIN access types from best to worst
+ACCESS_TYPES = ["system", "const", "eq_ref", "ref", "fulltext", "ref_or_null", "index_merge",
+                "unique_subquery", "index_subquery", "range", "index", "ALL"]
+
+
+def _require_mysql():
+    if get_pool().dialect != "mysql":
+        raise QueryError("Schema migrations and EXPLAIN checks target the MySQL ledger")
+
+
+def applied_versions():
+    _require_mysql()
+    pool = get_pool()
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"""create table if not exists {MIGRATIONS_TABLE} (
+                               version INT PRIMARY KEY,
+                               description VARCHAR(255) NOT NULL,
+                               applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+            cursor.execute(f"select version from {MIGRATIONS_TABLE}")
+            return {row[0] for row in cursor.fetchall()}
+        except pool.errors as e:
+            raise QueryError(str(e)) from e
+        finally:
+            cursor.close()
+
+
+# Apply every migration not yet recorded; returns the versions applied.
+# MySQL commits DDL implicitly, so a migration is recorded after its last statement.
+def migrate(progress=print):
+    done = applied_versions()
+    pool = get_pool()
+    p = pool.placeholder
+    applied = []
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            for version, description, statements in MIGRATIONS:
+                if version in done:
+                    continue
+                progress(f"Applying migration {version}: {description}")
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(f"insert into {MIGRATIONS_TABLE} (version, description) values ({p}, {p})",
+                               (version, description))
+                connection.commit()
+                applied.append(version)
+        except pool.errors as e:
+            raise QueryError(str(e)) from e
+        finally:
+            cursor.close()
+    return applied
+
+
+# Access type, index and estimated rows for each Police_Post_Logs step of a query plan
+def explain(query):
+    plan = run_query("explain " + query)
+    plan = plan[plan["table"] == "Police_Post_Logs"]
+    plan = plan.astype(object).where(plan.notna(), None)
+    return [{"type": row["type"], "key": row["key"], "rows": row["rows"]} for _, row in plan.iterrows()]
+
+
+# Steps without an access type (e.g. no table read) count as best
+def _rank(access_type):
+    return ACCESS_TYPES.index(access_type) if access_type in ACCESS_TYPES else 0
+
+
+# EXPLAIN every canned query; problems are full table scans (type ALL) and,
+# given a baseline, any step whose access type is worse than before. A full
+# scan of a covering index (type index) passes: the whole-table group-bys
+# have no better plan, it just reads a narrower structure than the table.
+def check_plans(baseline=None):
+    _require_mysql()
+    plans, problems = {}, []
+    for name, query in query_map.items():
+        steps = explain(query)
+        plans[name] = steps
+        if any(step["type"] == "ALL" for step in steps):
+            problems.append(f"{name}: full table scan")
+            continue
+        before = (baseline or {}).get(name)
+        if before is None:
+            continue
+        worst_before = max((_rank(step["type"]) for step in before), default=0)
+        worst_now = max((_rank(step["type"]) for step in steps), default=0)
+        if worst_now > worst_before:
+            problems.append(f"{name}: access type regressed from {ACCESS_TYPES[worst_before]} "
+                            f"to {ACCESS_TYPES[worst_now]}")
+    return plans, problems
+
+
+def _describe(step):
+    text = f"{step['type']} via {step['key'] or '-'}"
+    return text + " (full index scan)" if step["type"] == "index" else text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Police_Post_Logs schema migrations and query plan checks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="apply pending migrations")
+    commands.add_parser("status", help="list applied migrations")
+    explain_parser = commands.add_parser("explain", help="EXPLAIN every query_map entry")
+    explain_parser.add_argument("--baseline", help="plans JSON to compare against")
+    explain_parser.add_argument("--write-baseline", help="save the current plans as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        applied = migrate()
+        print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
+        return 0
+    if args.command == "status":
+        done = applied_versions()
+        for version, description, _ in MIGRATIONS:
+            print(f"{version}  {'applied' if version in done else 'pending'}  {description}")
+        return 0
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+    plans, problems = check_plans(baseline)
+    if args.write_baseline:
+        with open(args.write_baseline, "w", encoding="utf-8") as handle:
+            json.dump(plans, handle, indent=2, default=str)
+    for name, steps in plans.items():
+        print(f"{name}: " + ", ".join(_describe(step) for step in steps))
+    print("Full index scans (type index) pass; only full table scans (type ALL) fail.")
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Query and page instrumentation.
+# Every statement run through db.run_query, the background runner, the
+# Quick Metrics summary or the analytics snapshot records its latency, rows
+# and payload size here; queries served through the result cache also record
+# whether it answered them, and the dashboard records how long each page took
+# to render. Everything is kept in memory for
+# the life of the process: latency histograms per query and per page, recent
+# samples for percentiles, and a log of the slowest recent queries.
+# The Admin page shows it; prometheus_text() exports it for scraping, and
+# SECURECHECK_METRICS_PORT=<port> serves that export at /metrics.
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+SLOW_QUERY_SECONDS = 0.5   # queries slower than this go to the slow-query log
+SLOW_LOG_SIZE = 200        # slow queries kept
+SAMPLE_SIZE = 256          # recent latencies kept per series for percentiles
+MAX_SERIES = 500           # distinct queries tracked; the rest share one "other" series
+LABEL_LENGTH = 120
+
+METRICS_PORT = os.environ.get("SECURECHECK_METRICS_PORT")
+METRICS_HOST = os.environ.get("SECURECHECK_METRICS_HOST", "127.0.0.1")
+
+CACHE_STATUSES = ["hit", "miss", "bypass"]
+
+
+def query_label(sql):
+    label = " ".join(sql.split()).rstrip(";").strip()
+    return label if len(label) <= LABEL_LENGTH else label[:LABEL_LENGTH - 3] + "..."
+
+
+class Series:
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)   # last one is +Inf
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        position = 0
+        while position < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[position]:
+            position += 1
+        self.buckets[position] += 1
+        self.samples.append(seconds)
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+            "p50_ms": None if not self.samples else round(self.percentile(50) * 1000, 3),
+            "p95_ms": None if not self.samples else round(self.percentile(95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class QuerySeries(Series):
+
+    def __init__(self):
+        super().__init__()
+        self.rows = 0
+        self.bytes = 0
+        self.errors = 0
+        self.cache = dict.fromkeys(CACHE_STATUSES, 0)
+
+
+class MetricsStore:
+
+    def __init__(self, slow_seconds=SLOW_QUERY_SECONDS, slow_log_size=SLOW_LOG_SIZE, max_series=MAX_SERIES):
+        self.slow_seconds = slow_seconds
+        self.max_series = max_series
+        self._queries = {}
+        self._pages = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._started = time.time()
+        self._lock = threading.Lock()
+
+    def _series(self, table, label, factory):
+        series = table.get(label)
+        if series is None:
+            if len(table) >= self.max_series:
+                label = "other"
+                series = table.get(label)
+            if series is None:
+                series = table[label] = factory()
+        return series
+
+    # One statement executed on the database; `rows`/`nbytes` are None when it failed
+    def record_query(self, label, seconds, rows=None, nbytes=None, error=False):
+        with self._lock:
+            series = self._series(self._queries, label, QuerySeries)
+            series.observe(seconds)
+            series.rows += rows or 0
+            series.bytes += nbytes or 0
+            series.errors += error
+            if seconds >= self.slow_seconds:
+                self._slow.append({
+                    "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "query": label,
+                    "ms": round(seconds * 1000, 3),
+                    "rows": rows,
+                    "bytes": nbytes,
+                    "error": error,
+                })
+
+    # Whether the result cache answered a query ("hit"), had to run it
+    # ("miss") or was told to skip it ("bypass")
+    def record_cache(self, label, status):
+        with self._lock:
+            self._series(self._queries, label, QuerySeries).cache[status] += 1
+
+    def record_page(self, page, seconds):
+        with self._lock:
+            self._series(self._pages, page, Series).observe(seconds)
+
+    def query_summary(self):
+        with self._lock:
+            return [dict(series.summary(), query=label, rows=series.rows, bytes=series.bytes,
+                         errors=series.errors, **series.cache)
+                    for label, series in self._queries.items()]
+
+    def page_summary(self):
+        with self._lock:
+            return [dict(series.summary(), page=page) for page, series in self._pages.items()]
+
+    # Bucket counts ("<= 5 ms": n, ...) for one query or page, or all queries together
+    def histogram(self, label=None, pages=False):
+        with self._lock:
+            table = self._pages if pages else self._queries
+            chosen = [table[label]] if label is not None and label in table else list(table.values())
+            counts = [sum(series.buckets[position] for series in chosen)
+                      for position in range(len(LATENCY_BUCKETS) + 1)]
+        names = [f"<= {bound * 1000:g} ms" for bound in LATENCY_BUCKETS] + [f"> {LATENCY_BUCKETS[-1] * 1000:g} ms"]
+        return dict(zip(names, counts))
+
+    def slow_queries(self):
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._pages.clear()
+            self._slow.clear()
+            self._started = time.time()
+
+    def _histogram_lines(self, name, help_text, label_name, table):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for label, series in table.items():
+            tag = f'{label_name}="{_escape(label)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series.buckets):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{tag},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{tag},le="+Inf"}} {series.count}')
+            lines.append(f"{name}_sum{{{tag}}} {series.total:.6f}")
+            lines.append(f"{name}_count{{{tag}}} {series.count}")
+        return lines
+
+    # Everything in the Prometheus text exposition format
+    def prometheus_text(self):
+        with self._lock:
+            lines = self._histogram_lines("securecheck_query_duration_seconds", "Query latency.",
+                                          "query", self._queries)
+            lines += ["# HELP securecheck_query_rows_total Rows loaded from the database.",
+                      "# TYPE securecheck_query_rows_total counter"]
+            lines += [f'securecheck_query_rows_total{{query="{_escape(label)}"}} {series.rows}'
+                      for label, series in self._queries.items()]
+            lines += ["# HELP securecheck_query_bytes_total In-memory size of results loaded from the database.",
+                      "# TYPE securecheck_query_bytes_total counter"]
+            lines += [f'securecheck_query_bytes_total{{query="{_escape(label)}"}} {series.bytes}'
+                      for label, series in self._queries.items()]
+            lines += ["# HELP securecheck_query_errors_total Statements that failed.",
+                      "# TYPE securecheck_query_errors_total counter"]
+            lines += [f'securecheck_query_errors_total{{query="{_escape(label)}"}} {series.errors}'
+                      for label, series in self._queries.items()]
+            lines += ["# HELP securecheck_query_cache_total Queries by result cache status.",
+                      "# TYPE securecheck_query_cache_total counter"]
+            lines += [f'securecheck_query_cache_total{{query="{_escape(label)}",status="{status}"}} {count}'
+                      for label, series in self._queries.items() for status, count in series.cache.items()]
+            lines += self._histogram_lines("securecheck_page_render_seconds", "Dashboard page render time.",
+                                           "page", self._pages)
+        for source, read in list(_status_sources.items()):
+            try:
+                status = read()
+            except Exception:
+                continue
+            for key, value in (status or {}).items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    lines.append(f"securecheck_{source}_{key} {value}")
+        lines.append(f"securecheck_uptime_seconds {time.time() - self._started:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Other modules' status() dicts (pool, cache, live tail), exported as gauges
+
+_status_sources = {}
+
+
+def status_source(name):
+    def register(read):
+        _status_sources[name] = read
+        return read
+    return register
+
+
+def statuses():
+    result = {}
+    for source, read in list(_status_sources.items()):
+        try:
+            result[source] = read()
+        except Exception as e:
+            result[source] = {"error": str(e)}
+    return result
+
+
+# Process-wide store shared by every session
+
+metrics_store = MetricsStore()
+
+
+def record_query(label, seconds, rows=None, nbytes=None, error=False):
+    metrics_store.record_query(label, seconds, rows, nbytes, error)
+
+
+def record_cache(label, status):
+    metrics_store.record_cache(label, status)
+
+
+def record_page(page, seconds):
+    metrics_store.record_page(page, seconds)
+
+
+def prometheus_text():
+    return metrics_store.prometheus_text()
+
+
+# Optional /metrics endpoint for a Prometheus scraper
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+# Start serving /metrics once per process; Streamlit reruns call this freely
+def serve_metrics(port=METRICS_PORT, host=METRICS_HOST):
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="securecheck-metrics", daemon=True).start()
+        return _server
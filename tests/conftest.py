@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to check.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache  # noqa: E402
+import metrics  # noqa: E402
+from benchmark import load_synthetic  # noqa: E402
+from db import set_pool, sqlite_pool  # noqa: E402
+
+LOG_ROWS = 300
+
+
+# A fresh SQLite Police_Post_Logs with LOG_ROWS synthetic logs, installed as
+# the process-wide pool, with an empty result cache and no summary table
+@pytest.fixture
+def logs_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "securecheck.db")
+    set_pool(sqlite_pool(path))
+    monkeypatch.setattr(metrics, "_ready", False)
+    monkeypatch.setattr(cache, "query_cache", cache.QueryCache())
+    load_synthetic(LOG_ROWS, progress=lambda message: None)
+    yield path
+    set_pool(None)
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+import analytics
+from analytics import read_manifest, refresh_snapshot, run_snapshot_query, snapshot_ready
+from benchmark import load_synthetic
+from conftest import LOG_ROWS
+from db import QueryError, insert_log, run_query
+from queries import query_map
+
+pytest.importorskip("duckdb")
+
+COUNT_SQL = "select count(*) as total from Police_Post_Logs"
+
+
+def _quiet(message):
+    pass
+
+
+def _wait_for_background():
+    deadline = time.monotonic() + 30
+    while analytics._background is not None and analytics._background.is_alive():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_snapshot_answers_like_the_live_table(logs_db, tmp_path):
+    path = str(tmp_path / "snapshot")
+    refresh_snapshot(path, progress=_quiet)
+    assert read_manifest(path)["rows"] == LOG_ROWS
+    assert run_snapshot_query(COUNT_SQL, path).iloc[0, 0] == LOG_ROWS
+    name = "Gender Distribution of Drivers stopped in each Country"
+    live = run_query(query_map[name])
+    snapshot = run_snapshot_query(query_map[name], path)
+    assert snapshot.values.tolist() == live.values.tolist()
+
+
+def test_refresh_appends_new_rows(logs_db, tmp_path):
+    path = str(tmp_path / "snapshot")
+    refresh_snapshot(path, progress=_quiet)
+    insert_log({"country_name": "India", "vehicle_number": "TN0000001"})
+    manifest = refresh_snapshot(path, progress=_quiet)
+    assert manifest["rows"] == LOG_ROWS + 1
+    assert manifest["last_id"] == LOG_ROWS + 1
+    assert run_snapshot_query(COUNT_SQL, path).iloc[0, 0] == LOG_ROWS + 1
+
+
+def test_refresh_rebuilds_after_the_table_is_recreated(logs_db, tmp_path):
+    path = str(tmp_path / "snapshot")
+    refresh_snapshot(path, progress=_quiet)
+    load_synthetic(LOG_ROWS // 3, seed=2, progress=_quiet)
+    messages = []
+    manifest = refresh_snapshot(path, progress=messages.append)
+    assert any("rebuilding" in message for message in messages)
+    assert manifest["rows"] == LOG_ROWS // 3
+    assert run_snapshot_query(COUNT_SQL, path).iloc[0, 0] == LOG_ROWS // 3
+
+
+def test_dashboard_never_builds_the_snapshot_inside_a_query(logs_db, tmp_path):
+    path = str(tmp_path / "snapshot")
+    with pytest.raises(QueryError):
+        run_snapshot_query(COUNT_SQL, path)
+    assert not snapshot_ready(path)       # starts a background build
+    _wait_for_background()
+    assert snapshot_ready(path)
+    assert run_snapshot_query(COUNT_SQL, path).iloc[0, 0] == LOG_ROWS
+
+
+def test_a_truncated_table_is_not_served_from_the_old_snapshot(logs_db, tmp_path):
+    path = str(tmp_path / "snapshot")
+    refresh_snapshot(path, progress=_quiet)
+    load_synthetic(10, seed=3, progress=_quiet)
+    assert not snapshot_ready(path)
+    _wait_for_background()
+    assert read_manifest(path)["rows"] == 10
+    assert snapshot_ready(path)
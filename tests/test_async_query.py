@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from async_query import QueryCancelled, QueryTimeout, gather, kill_query, submit, submit_call
+from conftest import LOG_ROWS
+from db import get_pool, set_pool, sqlite_pool
+
+# Counts far enough to run for minutes unless it is interrupted
+SLOW_SQL = """with recursive n(x) as (select 1 union all select x + 1 from n)
+              select count(*) as total from (select x from n limit 1000000000)"""
+
+
+def _wait_until_running(handle):
+    deadline = time.monotonic() + 5
+    while handle.status != "running" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)   # let the statement reach the database
+
+
+def test_submit_returns_the_result(logs_db):
+    handle = submit("select count(*) as total from Police_Post_Logs", ttl=0)
+    assert handle.result().iloc[0, 0] == LOG_ROWS
+    assert handle.status == "done"
+
+
+def test_submit_stops_a_query_at_its_deadline(logs_db):
+    started = time.monotonic()
+    handle = submit(SLOW_SQL, timeout=0.3, ttl=0)
+    with pytest.raises(QueryTimeout):
+        handle.result()
+    assert handle.status == "timed out"
+    handle.future.exception(timeout=5)   # the worker is interrupted, not abandoned
+    assert time.monotonic() - started < 5
+
+
+def test_submit_can_be_cancelled(logs_db):
+    handle = submit(SLOW_SQL, timeout=30, ttl=0)
+    _wait_until_running(handle)
+    handle.cancel()
+    with pytest.raises(QueryCancelled):
+        handle.result()
+    handle.future.exception(timeout=5)
+    assert handle.status == "cancelled"
+
+
+def test_a_cancelled_query_does_not_hold_its_connection(logs_db):
+    handle = submit(SLOW_SQL, timeout=30, ttl=0)
+    _wait_until_running(handle)
+    handle.cancel()
+    handle.future.exception(timeout=5)
+    assert get_pool().status()["in_use"] == 0
+    assert submit("select 1 as one", ttl=0).result().iloc[0, 0] == 1
+
+
+def test_gather_returns_failures_in_place(logs_db):
+    handles = {
+        "count": submit("select count(*) as total from Police_Post_Logs", ttl=0),
+        "broken": submit("select * from no_such_table", ttl=0),
+        "call": submit_call(lambda: 42),
+    }
+    results = gather(handles)
+    assert results["count"].iloc[0, 0] == LOG_ROWS
+    assert isinstance(results["broken"], Exception)
+    assert results["call"] == 42
+
+
+def test_kill_query_does_not_wait_for_a_pooled_connection(tmp_path):
+    set_pool(sqlite_pool(str(tmp_path / "pool.db"), size=1, max_overflow=0, timeout=5))
+    try:
+        with get_pool().connection():
+            started = time.monotonic()
+            kill_query(1)   # SQLite rejects the statement; the error is swallowed
+            assert time.monotonic() - started < 1
+    finally:
+        set_pool(None)
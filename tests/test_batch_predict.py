@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+import predict
+from db import run_query
+from predict import PredictionIndex, predict_chunks, predict_csv, predict_frame
+
+STOP_COLUMNS = "driver_gender, driver_age, search_conducted, stop_duration, drugs_related_stop"
+
+
+@pytest.fixture
+def index(logs_db, monkeypatch):
+    index = PredictionIndex()
+    index.refresh()
+    monkeypatch.setattr(predict, "_index", index)
+    return index
+
+
+def _stops(rows=120):
+    return run_query(f"select {STOP_COLUMNS} from Police_Post_Logs order by id limit {rows}")
+
+
+def test_predict_csv_scores_every_row_in_order(index, tmp_path):
+    source, output = tmp_path / "stops.csv", tmp_path / "predictions.csv"
+    stops = _stops()
+    stops.to_csv(source, index=False)
+    assert predict_csv(str(source), str(output), chunk_size=50, workers=1, progress=lambda message: None) == 120
+    scored = pd.read_csv(output)
+    assert len(scored) == 120
+    assert scored["driver_gender"].tolist() == stops["driver_gender"].tolist()
+    for record, row in zip(stops.to_dict("records"), scored.to_dict("records")):
+        prediction = index.predict(record)
+        assert row["predicted_stop_outcome"] == prediction["stop_outcome"]
+        assert row["predicted_violation"] == prediction["violation"]
+
+
+def test_worker_processes_give_the_same_results(index):
+    stops = _stops()
+    chunks = [stops.iloc[start:start + 25] for start in range(0, len(stops), 25)]
+    serial = pd.concat(predict_chunks(chunks, workers=1), ignore_index=True)
+    parallel = pd.concat(predict_chunks(chunks, workers=2), ignore_index=True)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_csv_text_values_are_normalized(index):
+    typed = _stops(10)
+    text = typed.astype(str).replace({"1": "True", "0": "False"})
+    text["driver_age"] = typed["driver_age"].astype(float).astype(str)   # "25.0"
+    frames = index.lookup_frames()
+    columns = ["predicted_stop_outcome", "predicted_violation", "support"]
+    assert predict_frame(text, frames)[columns].values.tolist() == \
+        predict_frame(typed, frames)[columns].values.tolist()
+
+
+def test_stops_without_key_columns_fall_back_to_the_defaults(index):
+    scored = predict_frame(pd.DataFrame({"unrelated": ["x", "y"]}), index.lookup_frames())
+    assert scored["matched_on"].tolist() == ["all", "all"]
+    assert len(scored) == 2
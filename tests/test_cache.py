@@ -0,0 +1,90 @@
+import time
+
+import pandas as pd
+
+import cache
+from cache import QueryCache, cached_query
+from conftest import LOG_ROWS
+from db import insert_log
+
+
+def _frame(rows):
+    return pd.DataFrame({"value": range(rows)})
+
+
+def test_cache_serves_hits_until_the_ttl_expires():
+    query_cache = QueryCache(version_probe=None)
+    loads = []
+
+    def loader(sql, params):
+        loads.append(sql)
+        return _frame(3)
+
+    query_cache.fetch("select 1", loader=loader, ttl=0.05)
+    query_cache.fetch("select  1;", loader=loader, ttl=0.05)
+    assert len(loads) == 1
+    time.sleep(0.06)
+    query_cache.fetch("select 1", loader=loader, ttl=0.05)
+    assert len(loads) == 2
+    status = query_cache.status()
+    assert status["hits"] == 1
+    assert status["expirations"] == 1
+
+
+def test_cache_ttl_zero_bypasses_the_cache():
+    query_cache = QueryCache(version_probe=None)
+    loads = []
+    for _ in range(2):
+        query_cache.fetch("select 1", loader=lambda sql, params: loads.append(sql) or _frame(1), ttl=0)
+    assert len(loads) == 2
+    assert query_cache.status()["entries"] == 0
+
+
+def test_cache_evicts_least_recently_used_within_the_byte_budget():
+    size = int(_frame(100).memory_usage(index=True, deep=True).sum())
+    query_cache = QueryCache(max_bytes=size * 2, version_probe=None)
+    query_cache.put("a", _frame(100))
+    query_cache.put("b", _frame(100))
+    assert query_cache.get("a") is not None   # "b" is now the least recently used
+    query_cache.put("c", _frame(100))
+    assert query_cache.get("b") is None
+    assert query_cache.get("a") is not None
+    assert query_cache.get("c") is not None
+    status = query_cache.status()
+    assert status["evictions"] == 1
+    assert status["bytes"] <= status["max_bytes"]
+
+    query_cache.put("huge", _frame(1000))
+    assert query_cache.get("huge") is None
+    assert query_cache.status()["too_large"] == 1
+
+
+def test_cache_drops_results_loaded_across_an_invalidation():
+    query_cache = QueryCache(version_probe=None)
+
+    def loader(sql, params):
+        query_cache.invalidate()   # an insert lands while the query runs
+        return _frame(1)
+
+    query_cache.fetch("select 1", loader=loader)
+    assert query_cache.status()["entries"] == 0
+    assert query_cache.status()["invalidations"] == 1
+
+
+def test_cache_invalidates_when_the_version_probe_changes():
+    version = [1]
+    query_cache = QueryCache(version_check=0, version_probe=lambda: version[0])
+    query_cache.fetch("select 1", loader=lambda sql, params: _frame(1))
+    query_cache.fetch("select 1", loader=lambda sql, params: _frame(1))
+    assert query_cache.status()["hits"] == 1
+    version[0] = 2
+    query_cache.fetch("select 1", loader=lambda sql, params: _frame(1))
+    assert query_cache.status()["invalidations"] == 1
+
+
+def test_insert_log_invalidates_cached_results(logs_db):
+    query = "select count(*) as total from Police_Post_Logs"
+    assert cached_query(query).iloc[0, 0] == LOG_ROWS
+    insert_log({"country_name": "India", "vehicle_number": "TN0000001"})
+    assert cache.query_cache.status()["entries"] == 0
+    assert cached_query(query).iloc[0, 0] == LOG_ROWS + 1
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from conftest import LOG_ROWS
+from db import PoolError, PoolTimeout, QueryError, insert_log, run_query, sqlite_pool, translate_sql
+
+
+# Connection pool
+
+def test_pool_reuses_released_connections(tmp_path):
+    pool = sqlite_pool(str(tmp_path / "pool.db"), size=2)
+    for _ in range(3):
+        with pool.connection() as connection:
+            connection.execute("select 1")
+    status = pool.status()
+    assert status["created"] == 1
+    assert status["reused"] == 2
+    assert status["checkouts"] == 3
+    assert status["open"] == 1 and status["idle"] == 1 and status["in_use"] == 0
+
+
+def test_pool_overflow_is_closed_on_release(tmp_path):
+    pool = sqlite_pool(str(tmp_path / "pool.db"), size=1, max_overflow=1)
+    with pool.connection():
+        with pool.connection():
+            assert pool.status()["open"] == 2
+            assert pool.status()["in_use"] == 2
+    status = pool.status()
+    assert status["open"] == 1
+    assert status["discarded"] == 1
+
+
+def test_pool_times_out_when_exhausted(tmp_path):
+    pool = sqlite_pool(str(tmp_path / "pool.db"), size=1, max_overflow=1, timeout=0.1)
+    with pool.connection(), pool.connection():
+        started = time.monotonic()
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+        assert time.monotonic() - started >= 0.1
+    assert pool.status()["waits"] == 1
+    assert pool.status()["in_use"] == 0
+
+
+def test_pool_hands_over_a_released_connection_to_a_waiter(tmp_path):
+    pool = sqlite_pool(str(tmp_path / "pool.db"), size=1, max_overflow=0, timeout=5)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.connection():
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    threading.Timer(0.05, release.set).start()
+    with pool.connection() as connection:
+        connection.execute("select 1")
+    thread.join()
+    assert pool.status()["created"] == 1
+    assert pool.status()["waits"] == 1
+
+
+def test_pool_rolls_back_uncommitted_writes(tmp_path):
+    pool = sqlite_pool(str(tmp_path / "pool.db"), size=1)
+    with pool.connection() as connection:
+        connection.execute("create table t (x int)")
+        connection.commit()
+        connection.execute("insert into t values (1)")
+    with pool.connection() as connection:
+        assert connection.execute("select count(*) from t").fetchone()[0] == 0
+
+
+def test_pool_reports_connection_failures(tmp_path):
+    pool = sqlite_pool(str(tmp_path / "missing" / "pool.db"))
+    with pytest.raises(PoolError):
+        with pool.connection():
+            pass
+    assert pool.status()["open"] == 0
+
+
+# Queries
+
+def test_run_query_returns_a_frame(logs_db):
+    data = run_query("select id, vehicle_number from Police_Post_Logs where id <= ? order by id", (3,))
+    assert list(data.columns) == ["id", "vehicle_number"]
+    assert data["id"].tolist() == [1, 2, 3]
+
+
+def test_run_query_translates_mysql_date_functions(logs_db):
+    assert translate_sql("select extract(hour from stop_time) from t", "mysql") == \
+        "select extract(hour from stop_time) from t"
+    data = run_query("select extract(year from stop_date) as year, extract(hour from stop_time) as hour "
+                     "from Police_Post_Logs where id = 1")
+    stop_date, stop_time = run_query("select stop_date, stop_time from Police_Post_Logs where id = 1").iloc[0]
+    assert data.iloc[0].tolist() == [int(stop_date[:4]), int(stop_time[:2])]
+
+
+def test_run_query_raises_query_error(logs_db):
+    with pytest.raises(QueryError):
+        run_query("select * from no_such_table")
+
+
+def test_insert_log_returns_the_new_id(logs_db):
+    new_id = insert_log({"country_name": "India", "driver_age": 30, "vehicle_number": "TN0000001"})
+    assert new_id == LOG_ROWS + 1
+    row = run_query("select country_name, driver_age, vehicle_number from Police_Post_Logs where id = ?",
+                    (new_id,))
+    assert row.iloc[0].tolist() == ["India", 30, "TN0000001"]
@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from benchmark import generate_logs
+from conftest import LOG_ROWS
+from db import run_query
+from ingest import clean_chunk, ingest_csv
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _write_csv(path, rows):
+    logs = next(generate_logs(rows, seed=1))
+    logs.to_csv(path, index=False)
+    return logs
+
+
+def _loaded_plates():
+    return run_query(f"select vehicle_number from Police_Post_Logs where id > {LOG_ROWS} order by id")[
+        "vehicle_number"].tolist()
+
+
+def test_ingest_loads_every_row(logs_db, tmp_path):
+    path = tmp_path / "stops.csv"
+    logs = _write_csv(path, 250)
+    stats = ingest_csv(str(path), chunk_size=100, progress=lambda message: None)
+    assert stats["rows"] == 250 and stats["resumed_from"] == 0
+    assert _loaded_plates() == logs["vehicle_number"].tolist()
+    loaded = run_query(f"select stop_date, stop_time, driver_age, is_arrested from Police_Post_Logs "
+                       f"where id > {LOG_ROWS} order by id")
+    assert loaded["stop_date"].tolist() == [str(value) for value in logs["stop_date"]]
+    assert loaded["stop_time"].tolist() == [str(value) for value in logs["stop_time"]]
+    assert loaded["driver_age"].tolist() == logs["driver_age"].tolist()
+    assert loaded["is_arrested"].tolist() == logs["is_arrested"].tolist()
+
+
+def test_ingest_resumes_from_its_checkpoint(logs_db, tmp_path):
+    path = tmp_path / "stops.csv"
+    logs = _write_csv(path, 250)
+    messages = []
+
+    def stop_after_first_chunk(message):
+        messages.append(message)
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        ingest_csv(str(path), chunk_size=100, progress=stop_after_first_chunk)
+    assert len(_loaded_plates()) == 100
+
+    stats = ingest_csv(str(path), chunk_size=100, progress=lambda message: None)
+    assert stats["resumed_from"] == 100 and stats["rows"] == 150
+    assert _loaded_plates() == logs["vehicle_number"].tolist()
+
+    # Loading the whole file again is a no-op until asked to restart
+    assert ingest_csv(str(path), progress=lambda message: None)["rows"] == 0
+    assert ingest_csv(str(path), resume=False, progress=lambda message: None)["rows"] == 250
+
+
+def test_ingest_accepts_files_without_some_columns(logs_db, tmp_path):
+    path = tmp_path / "stops.csv"
+    logs = _write_csv(path, 20).drop(columns=["drugs_related_stop", "search_type"])
+    logs.to_csv(path, index=False)
+    assert ingest_csv(str(path), progress=lambda message: None)["rows"] == 20
+    loaded = run_query(f"select drugs_related_stop, search_type from Police_Post_Logs where id > {LOG_ROWS}")
+    assert loaded["drugs_related_stop"].isna().all()
+    assert (loaded["search_type"] == "none").all()
+
+
+def test_clean_chunk_parses_the_notebook_formats():
+    chunk = pd.DataFrame({
+        "stop_date": ["2020-01-02", "1/3/2020", "soon"],
+        "stop_time": ["10:30:00", "10:30", "later"],
+        "driver_age": ["25", "25.6", "unknown"],
+        "search_conducted": ["False", "TRUE", "maybe"],
+        "is_arrested": ["0", "1.0", None],
+    }, dtype=str)
+    cleaned = clean_chunk(chunk)
+    assert [str(value) for value in cleaned["stop_date"][:2]] == ["2020-01-02", "2020-01-03"]
+    assert [str(value) for value in cleaned["stop_time"][:2]] == ["10:30:00", "10:30:00"]
+    assert cleaned["stop_date"].isna()[2] and cleaned["stop_time"].isna()[2]
+    assert cleaned["driver_age"].tolist()[:2] == [25, 26] and cleaned["driver_age"].isna()[2]
+    assert cleaned["search_conducted"].tolist()[:2] == [0, 1] and cleaned["search_conducted"].isna()[2]
+    assert cleaned["is_arrested"].tolist()[:2] == [0, 1]
+    assert cleaned["drugs_related_stop"].isna().all()
+    assert cleaned["search_type"].tolist() == ["none"] * 3
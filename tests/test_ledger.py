@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import LOG_ROWS
+from db import QueryError, get_pool, run_query
+from ledger import fetch_page
+
+
+def _ledger_loader(query, params=None, ttl=None, dtypes=None):
+    return run_query(query, params, dtypes)
+
+
+def _walk(sort, descending, page_size, filters=None):
+    columns = list(dict.fromkeys(["id", sort]))
+    ids, after = [], None
+    while True:
+        page, after = fetch_page(columns, sort=sort, descending=descending, filters=filters,
+                                 after=after, page_size=page_size, loader=_ledger_loader)
+        ids += page["id"].tolist()
+        if after is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort", ["id", "stop_date", "stop_time", "country_name", "driver_age", "violation", "stop_outcome"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_keyset_pages_return_every_row_once_in_order(logs_db, sort, descending):
+    # NULLs in the sort column must be paged through as well
+    if sort != "id":
+        with get_pool().connection() as connection:
+            connection.execute(f"update Police_Post_Logs set {sort} = null where id % 7 = 0")
+            connection.commit()
+    direction = "desc" if descending else "asc"
+    expected = run_query(f"select id from Police_Post_Logs order by {sort} {direction}, id {direction}")
+    ids = _walk(sort, descending, page_size=37)
+    assert len(ids) == len(set(ids)) == LOG_ROWS
+    assert ids == expected["id"].tolist()
+
+
+def test_keyset_pages_respect_filters(logs_db):
+    expected = run_query("select id from Police_Post_Logs where country_name = 'India' "
+                         "order by driver_age desc, id desc")
+    ids = _walk("driver_age", True, page_size=25, filters={"country_name": "India"})
+    assert ids == expected["id"].tolist()
+
+
+def test_unindexed_sort_orders_are_rejected(logs_db):
+    with pytest.raises(QueryError):
+        fetch_page(sort="vehicle_number", loader=_ledger_loader)
+
+
+def test_first_page_and_cursor(logs_db):
+    page, after = fetch_page(["id", "violation"], page_size=25, loader=_ledger_loader)
+    assert list(page.columns) == ["id", "violation"]
+    assert page["id"].tolist() == list(range(LOG_ROWS, LOG_ROWS - 25, -1))
+    assert after == (LOG_ROWS - 24, LOG_ROWS - 24)
@@ -0,0 +1,68 @@
+from conftest import LOG_ROWS
+from db import get_pool, insert_log
+from live_tail import LiveTail
+from metrics import read_summary
+
+
+def _add_logs(count):
+    pool = get_pool()
+    with pool.connection() as connection:
+        connection.executemany("insert into Police_Post_Logs (country_name, vehicle_number) values (?, ?)",
+                               [("India", f"TN{n:07d}") for n in range(count)])
+        connection.commit()
+
+
+def _tail(monkeypatch, buffer_size):
+    tail = LiveTail(buffer_size=buffer_size)
+    monkeypatch.setattr(tail, "_ensure_running", lambda: None)   # poll by hand
+    return tail
+
+
+def test_live_tail_first_read_is_not_a_gap(logs_db, monkeypatch):
+    tail = _tail(monkeypatch, buffer_size=50)
+    rows, metrics, gap = tail.read(limit=10)
+    assert not gap
+    assert [row["id"] for row in rows] == list(range(LOG_ROWS - 9, LOG_ROWS + 1))
+    assert metrics["total_stops"] == LOG_ROWS
+
+    rows, _, gap = tail.read(after_id=LOG_ROWS)
+    assert rows == [] and not gap
+
+
+def test_live_tail_reports_a_gap_when_a_reader_falls_behind(logs_db, monkeypatch):
+    tail = _tail(monkeypatch, buffer_size=50)
+    tail.read()
+    _add_logs(60)
+    assert tail._poll() == 60
+    assert tail.last_id == LOG_ROWS + 60
+
+    rows, metrics, gap = tail.read(after_id=LOG_ROWS, limit=100)
+    assert gap
+    assert rows[0]["id"] == LOG_ROWS + 11
+    assert metrics["total_stops"] == LOG_ROWS + 60
+
+    rows, _, gap = tail.read(after_id=LOG_ROWS + 50, limit=5)
+    assert gap
+    assert [row["id"] for row in rows] == list(range(LOG_ROWS + 56, LOG_ROWS + 61))
+
+    rows, _, gap = tail.read(after_id=LOG_ROWS + 50, limit=10)
+    assert not gap
+    assert len(rows) == 10
+
+
+def test_live_tail_counts_new_rows_into_the_metrics(logs_db, monkeypatch):
+    tail = _tail(monkeypatch, buffer_size=50)
+    _, before, _ = tail.read()
+    insert_log({"country_name": "India", "stop_outcome": "Arrest Driver", "is_arrested": 1,
+                "drugs_related_stop": 1, "vehicle_number": "TN0000001"})
+    insert_log({"country_name": "India", "stop_outcome": "Warning", "is_arrested": 0,
+                "drugs_related_stop": 0, "vehicle_number": "TN0000002"})
+    assert tail._poll() == 2
+    rows, after, gap = tail.read(after_id=LOG_ROWS)
+    assert not gap
+    assert [row["vehicle_number"] for row in rows] == ["TN0000001", "TN0000002"]
+    assert after["total_stops"] == before["total_stops"] + 2
+    assert after["total_arrests"] == before["total_arrests"] + 1
+    assert after["total_warnings"] == before["total_warnings"] + 1
+    assert after["drug_related_stops"] == before["drug_related_stops"] + 1
+    assert after == read_summary()[0]
@@ -0,0 +1,113 @@
+import pytest
+
+import metrics
+from conftest import LOG_ROWS
+from db import QueryError, Watermark, get_pool, insert_lock, insert_log, run_query
+from metrics import METRIC_COLUMNS, metric_deltas, quick_metrics, read_summary
+
+
+class MySQLCursor:
+    # Refuses to fetch from statements without a result set, like mysql.connector
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.statements = []
+        self.description = None
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        self.description = [("value",)] if sql.lstrip().lower().startswith("select") else None
+
+    def fetchall(self):
+        if self.description is None:
+            raise AssertionError("No result set to fetch from")
+        return [self.results.pop(0)]
+
+    def close(self):
+        pass
+
+
+class MySQLConnection:
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def _expected():
+    data = run_query("select stop_outcome, drugs_related_stop from Police_Post_Logs")
+    outcome = data["stop_outcome"].fillna("").str.lower()
+    return {
+        "total_stops": len(data),
+        "total_arrests": int(outcome.str.contains("arrest").sum()),
+        "total_warnings": int(outcome.str.contains("warning").sum()),
+        "drug_related_stops": int((data["drugs_related_stop"] == 1).sum()),
+    }
+
+
+def test_summary_matches_the_table(logs_db):
+    summary, as_of = read_summary()
+    assert summary == _expected()
+    assert as_of == LOG_ROWS
+
+
+def test_insert_log_updates_the_summary(logs_db):
+    read_summary()
+    insert_log({"stop_outcome": "Arrest Driver", "drugs_related_stop": 1, "vehicle_number": "TN0000001"})
+    insert_log({"stop_outcome": "Warning", "drugs_related_stop": 0, "vehicle_number": "TN0000002"})
+    # Counted in the insert's own transaction, before any catch-up read
+    with get_pool().connection() as connection:
+        (last_log_id,), = connection.execute(f"select last_log_id from {metrics.SUMMARY_TABLE}").fetchall()
+    assert last_log_id == LOG_ROWS + 2
+    assert quick_metrics() == _expected()
+
+
+def test_rows_inserted_elsewhere_are_caught_up(logs_db):
+    read_summary()
+    with get_pool().connection() as connection:
+        connection.executemany("insert into Police_Post_Logs (stop_outcome, drugs_related_stop) values (?, ?)",
+                               [("Arrest Passenger", 1), ("Citation", 0), (None, None)])
+        connection.commit()
+    summary, as_of = read_summary()
+    assert as_of == LOG_ROWS + 3
+    assert summary == _expected()
+
+
+def test_summary_statements_never_fetch_without_a_result_set(logs_db, monkeypatch):
+    cursor = MySQLCursor(results=[(7,), (2, 1, 0, 1, 9)])
+    monkeypatch.setattr(get_pool(), "dialect", "mysql")
+    metrics.catch_up(MySQLConnection(cursor))
+    assert cursor.statements[-1].lstrip().startswith("update")
+    assert metrics._execute(cursor, "create table t (x int)") == []
+
+
+def test_metric_deltas_follow_the_sql_rules():
+    records = [
+        {"stop_outcome": "Arrest Driver", "drugs_related_stop": 1},
+        {"stop_outcome": "warning", "drugs_related_stop": "1"},
+        {"stop_outcome": None, "drugs_related_stop": None},
+        {"stop_outcome": float("nan"), "drugs_related_stop": float("nan")},
+    ]
+    assert metric_deltas(records) == dict(zip(METRIC_COLUMNS, [4, 1, 1, 2]))
+
+
+def test_watermark_reads_only_new_rows():
+    watermark = Watermark()
+    assert watermark.where("?") == ("id > ?", (0,))
+    watermark.advance(10)
+    watermark.advance(None)
+    watermark.advance(float("nan"))
+    assert watermark.where("%s", "log_id") == ("log_id > %s", (10,))
+
+
+def test_insert_lock_serializes_mysql_writers():
+    cursor = MySQLCursor(results=[(1,), (1,)])
+    with insert_lock(MySQLConnection(cursor), "mysql"):
+        assert "get_lock" in cursor.statements[-1]
+    assert "release_lock" in cursor.statements[-1]
+
+    with pytest.raises(QueryError):
+        with insert_lock(MySQLConnection(MySQLCursor(results=[(0,)])), "mysql"):
+            pass
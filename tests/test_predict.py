@@ -0,0 +1,105 @@
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from db import insert_log, run_query
+from predict import BACKOFF_LEVELS, DEFAULT_PREDICTION, PredictionIndex, normalize, predict_frame
+
+UNSEEN = [
+    {"driver_gender": "F", "driver_age": 99, "search_conducted": 1, "stop_duration": "30+ Min",
+     "drugs_related_stop": 1},
+    {"driver_gender": "X", "driver_age": None, "search_conducted": 0, "stop_duration": "0-15 Min",
+     "drugs_related_stop": 0},
+    {"driver_gender": None, "driver_age": "abc", "search_conducted": None, "stop_duration": None,
+     "drugs_related_stop": None},
+]
+
+
+def _stops():
+    return run_query("select driver_gender, driver_age, search_conducted, stop_duration, drugs_related_stop "
+                     "from Police_Post_Logs order by id limit 60")
+
+
+def _brute_force(ledger, record):
+    keys = normalize(record)
+    for columns in BACKOFF_LEVELS:
+        rows = ledger
+        for column in columns:
+            rows = rows[rows[column] == keys[column]] if keys[column] is not None else rows.iloc[0:0]
+        rows = rows.dropna(subset=["stop_outcome", "violation"])
+        if len(rows):
+            outcomes, violations = Counter(rows["stop_outcome"]), Counter(rows["violation"])
+            return [min(v for v, n in counts.items() if n == max(counts.values()))
+                    for counts in (outcomes, violations)]
+    return [DEFAULT_PREDICTION["stop_outcome"], DEFAULT_PREDICTION["violation"]]
+
+
+def test_predictions_match_a_scan_of_the_ledger(logs_db):
+    ledger = run_query("select * from Police_Post_Logs")
+    ledger["age_group"] = ledger["driver_age"] // 10 * 10
+    index = PredictionIndex()
+    index.refresh()
+    for record in _stops().to_dict("records")[:20] + UNSEEN:
+        prediction = index.predict(record)
+        assert [prediction["stop_outcome"], prediction["violation"]] == _brute_force(ledger, record)
+
+
+def test_single_and_batch_predictions_agree(logs_db):
+    index = PredictionIndex()
+    index.refresh()
+    stops = pd.concat([_stops(), pd.DataFrame(UNSEEN)], ignore_index=True)
+    scored = predict_frame(stops, index.lookup_frames())
+    for record, row in zip(stops.to_dict("records"), scored.to_dict("records")):
+        prediction = index.predict(record)
+        assert row["predicted_stop_outcome"] == prediction["stop_outcome"]
+        assert row["predicted_violation"] == prediction["violation"]
+        assert row["support"] == prediction["support"]
+
+
+def test_refresh_folds_in_new_rows_like_a_rebuild(logs_db):
+    index = PredictionIndex()
+    index.refresh()
+    for _ in range(5):
+        insert_log({"driver_gender": "F", "driver_age": 99, "search_conducted": 1, "stop_duration": "30+ Min",
+                    "drugs_related_stop": 1, "stop_outcome": "Arrest Driver", "violation": "DUI"})
+    index.refresh()
+    rebuilt = PredictionIndex()
+    rebuilt.refresh()
+    assert index.predict(UNSEEN[0]) == rebuilt.predict(UNSEEN[0])
+    assert index.predict(UNSEEN[0])["stop_outcome"] == "Arrest Driver"
+    assert index.predict(UNSEEN[0])["support"] == 5
+    for (_, mine), (_, theirs) in zip(index.lookup_frames(), rebuilt.lookup_frames()):
+        assert mine.sort_values(list(mine.columns)).values.tolist() == \
+            theirs.sort_values(list(theirs.columns)).values.tolist()
+
+
+def test_predict_is_safe_during_a_refresh(logs_db):
+    index = PredictionIndex()
+    index.refresh()
+    stops = _stops().to_dict("records")
+    errors = []
+    done = threading.Event()
+
+    def write():
+        try:
+            for n in range(30):
+                insert_log({"driver_gender": "M", "driver_age": 20 + n, "search_conducted": 0,
+                            "stop_duration": "0-15 Min", "drugs_related_stop": 0,
+                            "stop_outcome": f"Outcome {n}", "violation": "Speeding"})
+                index.refresh()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not done.is_set():
+        for record in stops:
+            try:
+                index.predict(record)
+            except Exception as e:
+                errors.append(e)
+    writer.join()
+    assert errors == []
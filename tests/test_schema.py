@@ -0,0 +1,82 @@
+import re
+
+import pytest
+
+import schema
+from db import get_pool, run_query
+from ledger import SORT_COLUMNS, fetch_page
+from schema import MIGRATIONS, check_plans
+
+
+def _apply_migrations():
+    with get_pool().connection() as connection:
+        for _, _, statements in MIGRATIONS:
+            for statement in statements:
+                connection.execute(statement)
+        connection.commit()
+
+
+def _plan(query, params):
+    with get_pool().connection() as connection:
+        return " ".join(row[-1] for row in connection.execute("explain query plan " + query, params).fetchall())
+
+
+def test_migrations_are_numbered_once_each():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == list(range(1, len(MIGRATIONS) + 1))
+    names = [re.search(r"create index (\w+)", statement).group(1)
+             for _, _, statements in MIGRATIONS for statement in statements]
+    assert len(names) == len(set(names))
+
+
+def test_every_ledger_sort_order_has_a_column_id_index():
+    indexed = {match.group(1) for _, _, statements in MIGRATIONS for statement in statements
+               for match in [re.search(r"\((\w+), id\)", statement)] if match}
+    assert set(SORT_COLUMNS) - {"id"} <= indexed
+
+
+def test_ledger_pages_read_through_the_sort_index(logs_db):
+    _apply_migrations()
+    captured = []
+
+    def loader(query, params=None, ttl=None, dtypes=None):
+        captured.append((query, params))
+        return run_query(query, params, dtypes)
+
+    for sort in SORT_COLUMNS[1:]:
+        _, after = fetch_page(["id", sort], sort=sort, page_size=10, loader=loader)
+        fetch_page(["id", sort], sort=sort, page_size=10, after=after, loader=loader)
+    for query, params in captured:
+        plan = _plan(query, params)
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan, (query, plan)
+
+
+def test_check_plans_fails_only_full_table_scans(monkeypatch):
+    plans = {
+        "covered": [{"type": "index", "key": "idx_violation_outcomes", "rows": 1000}],
+        "scanned": [{"type": "ALL", "key": None, "rows": 1000}],
+        "looked up": [{"type": "ref", "key": "idx_vehicle_activity", "rows": 3}],
+    }
+    monkeypatch.setattr(schema, "_require_mysql", lambda: None)
+    monkeypatch.setattr(schema, "query_map", {name: name for name in plans})
+    monkeypatch.setattr(schema, "explain", lambda query: plans[query])
+    _, problems = check_plans()
+    assert problems == ["scanned: full table scan"]
+
+    baseline = {"looked up": [{"type": "const", "key": "PRIMARY", "rows": 1}]}
+    _, problems = check_plans(baseline)
+    assert "looked up: access type regressed from const to ref" in problems
+
+
+def test_check_plans_output_marks_full_index_scans(monkeypatch, capsys):
+    monkeypatch.setattr(schema, "check_plans", lambda baseline=None: (
+        {"covered": [{"type": "index", "key": "idx_violation_outcomes", "rows": 1000}]}, []))
+    assert schema.main(["explain"]) == 0
+    output = capsys.readouterr().out
+    assert "index via idx_violation_outcomes (full index scan)" in output
+    assert "Full index scans (type index) pass" in output
+
+
+def test_migrations_need_mysql(logs_db):
+    with pytest.raises(schema.QueryError):
+        schema.applied_versions()
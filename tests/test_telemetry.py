@@ -0,0 +1,110 @@
+import pytest
+
+import telemetry
+from cache import cached_query
+from db import QueryError, run_query
+from metrics import SUMMARY_TABLE, read_summary
+from telemetry import LATENCY_BUCKETS, MetricsStore, query_label
+
+COUNT_SQL = "select count(*) as stops from Police_Post_Logs where country_name = ?"
+
+
+@pytest.fixture
+def store(logs_db):
+    telemetry.metrics_store.reset()
+    yield telemetry.metrics_store
+    telemetry.metrics_store.reset()
+
+
+def _series(store, sql):
+    label = query_label(sql)
+    return next(series for series in store.query_summary() if series["query"] == label)
+
+
+# The store on its own
+
+def test_store_buckets_and_slow_log():
+    store = MetricsStore(slow_seconds=1)
+    for seconds in [0.0005, 0.02, 0.02, 2]:
+        store.record_query("q", seconds, rows=10, nbytes=100)
+    store.record_query("q", 0.002, error=True)
+    summary, = store.query_summary()
+    assert summary["count"] == 5
+    assert (summary["rows"], summary["bytes"], summary["errors"]) == (40, 400, 1)
+    assert summary["max_ms"] == 2000
+    histogram = store.histogram("q")
+    assert list(histogram.values())[:5] == [1, 1, 0, 2, 0]
+    assert sum(histogram.values()) == 5
+    assert len(histogram) == len(LATENCY_BUCKETS) + 1
+    slow, = store.slow_queries()
+    assert (slow["query"], slow["ms"], slow["rows"]) == ("q", 2000, 10)
+
+
+def test_store_folds_extra_queries_into_other():
+    store = MetricsStore(max_series=3)
+    for number in range(5):
+        store.record_query(f"q{number}", 0.01)
+    counts = {series["query"]: series["count"] for series in store.query_summary()}
+    assert counts == {"q0": 1, "q1": 1, "q2": 1, "other": 2}
+
+
+def test_query_label_collapses_whitespace():
+    assert query_label("select  *\n  from t;") == "select * from t"
+    assert len(query_label("select " + "x, " * 100 + "y from t")) == telemetry.LABEL_LENGTH
+
+
+# What the data layer records
+
+def test_run_query_records_rows_and_bytes(store):
+    data = run_query(COUNT_SQL, ("India",))
+    series = _series(store, COUNT_SQL)
+    assert series["count"] == 1 and series["errors"] == 0
+    assert series["rows"] == 1
+    assert series["bytes"] == int(data.memory_usage(index=True, deep=True).sum())
+
+
+def test_run_query_records_failures(store):
+    sql = "select * from no_such_table"
+    with pytest.raises(QueryError):
+        run_query(sql)
+    series = _series(store, sql)
+    assert (series["count"], series["errors"], series["rows"]) == (1, 1, 0)
+
+
+def test_cached_query_records_cache_status_and_runs_once(store):
+    cached_query(COUNT_SQL, ("India",), ttl=60)
+    cached_query(COUNT_SQL, ("India",), ttl=60)
+    cached_query(COUNT_SQL, ("India",), ttl=0)
+    series = _series(store, COUNT_SQL)
+    assert (series["miss"], series["hit"], series["bypass"]) == (1, 1, 1)
+    # Only the miss and the bypass reached the database
+    assert series["count"] == 2
+
+
+def test_summary_statements_are_recorded(store):
+    read_summary()
+    labels = {series["query"] for series in store.query_summary()}
+    assert query_label(f"select last_log_id from {SUMMARY_TABLE} where id = 1") in labels
+    assert query_label("select max(id) from Police_Post_Logs") in labels
+
+
+# Export
+
+def test_prometheus_text_has_series_and_status_gauges(store):
+    cached_query(COUNT_SQL, ("India",), ttl=60)
+    text = store.prometheus_text()
+    tag = f'query="{query_label(COUNT_SQL)}"'
+    assert f'securecheck_query_duration_seconds_bucket{{{tag},le="+Inf"}} 1' in text
+    assert f"securecheck_query_duration_seconds_count{{{tag}}} 1" in text
+    assert f"securecheck_query_rows_total{{{tag}}} 1" in text
+    assert f'securecheck_query_cache_total{{{tag},status="miss"}} 1' in text
+    assert f'securecheck_query_cache_total{{{tag},status="hit"}} 0' in text
+    assert "\nsecurecheck_pool_checkouts " in text
+    assert "\nsecurecheck_cache_" in text
+    assert "\nsecurecheck_uptime_seconds " in text
+
+
+def test_prometheus_text_escapes_labels():
+    store = MetricsStore()
+    store.record_query('select "a\\b"', 0.01)
+    assert 'query="select \\"a\\\\b\\""' in store.prometheus_text()
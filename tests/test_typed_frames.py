@@ -0,0 +1,62 @@
+import sqlite3
+import warnings
+
+import pandas as pd
+
+from conftest import LOG_ROWS
+from db import LOG_DTYPES, read_frame, run_query
+from queries import query_map
+
+
+def _cursor(rows, columns):
+    connection = sqlite3.connect(":memory:")
+    connection.execute(f"create table t ({', '.join(columns)})")
+    connection.executemany(f"insert into t values ({', '.join('?' for _ in columns)})", rows)
+    return connection.execute(f"select {', '.join(columns)} from t order by rowid")
+
+
+def test_ledger_columns_get_the_requested_dtypes(logs_db):
+    data = run_query("select stop_date, stop_time, driver_age, is_arrested, violation from Police_Post_Logs",
+                     dtypes=LOG_DTYPES)
+    assert len(data) == LOG_ROWS
+    assert str(data["driver_age"].dtype) == "Int16"
+    assert str(data["is_arrested"].dtype) == "Int8"
+    assert isinstance(data["violation"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(data["stop_date"])
+    assert pd.api.types.is_timedelta64_dtype(data["stop_time"])
+
+
+def test_columns_are_left_alone_without_dtypes(logs_db):
+    data = run_query(query_map["Driver Violation Trends Based on Age and Race"])
+    assert data["driver_age"].notna().all()
+    assert set(data["driver_age"]) <= {"<20", "20-29", "30-39", "40-49", "50+"}
+
+
+def test_every_batch_gets_the_same_dtype():
+    rows = [(f"2020-01-{day:02d}", "10:00:00", str(20 + day), "Speeding") for day in range(1, 13)]
+    rows[7] = ("unknown", "later", "unknown", None)
+    cursor = _cursor(rows, ["stop_date", "stop_time", "driver_age", "violation"])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        data = read_frame(cursor, fetch_size=5, dtypes=LOG_DTYPES)
+    assert str(data["driver_age"].dtype) == "Int16"
+    assert pd.api.types.is_datetime64_any_dtype(data["stop_date"])
+    assert pd.api.types.is_timedelta64_dtype(data["stop_time"])
+    assert isinstance(data["violation"].dtype, pd.CategoricalDtype)
+    assert data.iloc[7].isna().all()
+    assert data["driver_age"].notna().sum() == 11
+    assert data.loc[0, "stop_date"] == pd.Timestamp("2020-01-01")
+
+
+def test_categories_are_merged_across_batches():
+    rows = [("India",), ("India",), (None,), (None,), ("USA",)]
+    data = read_frame(_cursor(rows, ["country_name"]), fetch_size=2, dtypes=LOG_DTYPES)
+    assert isinstance(data["country_name"].dtype, pd.CategoricalDtype)
+    assert data["country_name"].tolist()[:2] == ["India", "India"]
+    assert data["country_name"].iloc[4] == "USA"
+
+
+def test_empty_results_keep_the_columns():
+    data = read_frame(_cursor([], ["stop_date", "driver_age"]), dtypes=LOG_DTYPES)
+    assert list(data.columns) == ["stop_date", "driver_age"]
+    assert str(data["driver_age"].dtype) == "Int16"
@@ -0,0 +1,75 @@
+from db import insert_log, run_query
+from vehicles import COUNTERS, TOP_SIZE, VehicleIndex, normalize_plate
+
+COUNTS_SQL = """select vehicle_number, count(*) as stops,
+                sum(case when search_conducted = 1 then 1 else 0 end) as searches,
+                sum(case when is_arrested = 1 then 1 else 0 end) as arrests,
+                sum(case when drugs_related_stop = 1 then 1 else 0 end) as drug_stops
+                from Police_Post_Logs where vehicle_number is not null group by vehicle_number"""
+
+
+def _index(watch_list=()):
+    index = VehicleIndex(watch_list=watch_list)
+    index.refresh()
+    return index
+
+
+def _expected_top(counter):
+    counts = run_query(COUNTS_SQL)
+    counts = counts[counts[counter] > 0].sort_values([counter, "vehicle_number"], ascending=False)
+    return list(zip(counts["vehicle_number"], counts[counter]))[:TOP_SIZE]
+
+
+def _top(index, counter):
+    return [(record["vehicle_number"], record[counter]) for record in index.top(counter)]
+
+
+def test_lookup_matches_the_ledger(logs_db):
+    index = _index()
+    counts = run_query(COUNTS_SQL).set_index("vehicle_number")
+    assert len(index) == len(counts)
+    plate = counts.index[0]
+    record = index.lookup(plate.lower()[:4] + " " + plate[4:].lower())
+    assert [record[counter] for counter in COUNTERS] == counts.loc[plate, COUNTERS].tolist()
+    assert index.lookup("NO SUCH PLATE") is None
+
+
+def test_top_lists_match_the_ledger_after_each_refresh(logs_db):
+    index = _index()
+    for counter in COUNTERS:
+        assert _top(index, counter) == _expected_top(counter)
+    # Push a plate that was nowhere near the top to the head of every list
+    plate = run_query(COUNTS_SQL).sort_values("stops")["vehicle_number"].iloc[0]
+    for _ in range(40):
+        insert_log({"vehicle_number": plate, "search_conducted": 1, "is_arrested": 1, "drugs_related_stop": 1})
+    index.refresh()
+    for counter in COUNTERS:
+        assert _top(index, counter) == _expected_top(counter)
+        assert _top(index, counter)[0][0] == plate
+
+
+def test_search_returns_plates_in_order(logs_db):
+    index = _index()
+    plates = sorted(run_query(COUNTS_SQL)["vehicle_number"])
+    found = [record["vehicle_number"] for record in index.search("tn00000", limit=5)]
+    assert found == [plate for plate in plates if plate.startswith("TN00000")][:5]
+    assert index.search("") == []
+
+
+def test_new_plates_are_found_after_refresh(logs_db):
+    index = _index()
+    insert_log({"vehicle_number": "ka 01 ab 1234", "drugs_related_stop": 1})
+    index.refresh()
+    assert index.lookup("KA01AB1234")["stops"] == 1
+    assert [record["vehicle_number"] for record in index.search("KA01")] == ["KA01AB1234"]
+
+
+def test_check_flags_watch_list_and_records(logs_db):
+    index = _index(watch_list={normalize_plate("wanted 1")})
+    insert_log({"vehicle_number": "DRUGS1", "drugs_related_stop": 1})
+    insert_log({"vehicle_number": "CLEAN1"})
+    index.refresh()
+    hits = index.check(["wanted 1", "drugs1", "clean1", "never seen", ""])
+    assert hits == {"WANTED1": ["watch list"], "DRUGS1": ["drug related stop"]}
+    index.add_to_watch_list("clean1")
+    assert index.check(["CLEAN1"]) == {"CLEAN1": ["watch list"]}
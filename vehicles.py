@@ -0,0 +1,211 @@
+import heapq
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+
+from db import Watermark, after_insert, get_pool, run_query
+
+# Suspect-vehicle lookup for checkpoint officers.
+# Per-vehicle counters (stops, searches, arrests, drug related stops) are held
+# in a dict keyed by plate, so checking the vehicle at the barrier is one hash
+# lookup instead of a scan of the ledger. A sorted list of plates answers
+# prefix searches with a binary search. The index is built on first use and
+# folds in only rows with an id above the last one it has seen after that.
+
+COUNTERS = ["stops", "searches", "arrests", "drug_stops"]
+
+REFRESH_SECONDS = 5    # how often to look for rows inserted by other processes
+SEARCH_LIMIT = 20      # plates returned for a prefix search
+TOP_SIZE = 10          # vehicles kept in each most-stopped / most-searched list
+
+# Plates to flag whenever they are looked up, one per line
+WATCH_LIST_PATH = os.environ.get("SECURECHECK_WATCH_LIST", "watch_list.txt")
+
+VEHICLE_SQL = """select vehicle_number, count(*) as stops,
+                 coalesce(sum(case when search_conducted = 1 then 1 else 0 end), 0) as searches,
+                 coalesce(sum(case when is_arrested = 1 then 1 else 0 end), 0) as arrests,
+                 coalesce(sum(case when drugs_related_stop = 1 then 1 else 0 end), 0) as drug_stops,
+                 max(stop_date) as last_seen, max(id) as last_id
+                 from Police_Post_Logs
+                 where {new_rows} and vehicle_number is not null
+                 group by vehicle_number"""
+
+
+def normalize_plate(plate):
+    if plate is None:
+        return ""
+    return "".join(str(plate).split()).upper()
+
+
+def load_watch_list(path=WATCH_LIST_PATH):
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return {normalize_plate(line) for line in handle if normalize_plate(line)}
+    except OSError:
+        return set()
+
+
+class VehicleIndex:
+
+    def __init__(self, loader=run_query, refresh_seconds=REFRESH_SECONDS, watch_list=None):
+        self._loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.watch_list = set(watch_list) if watch_list is not None else load_watch_list()
+        self._vehicles = {}     # plate -> [stops, searches, arrests, drug_stops, last_seen]
+        self._plates = []       # sorted plates, for prefix search
+        self._top = {counter: [] for counter in COUNTERS}   # counter -> top TOP_SIZE plates
+        self.watermark = Watermark()
+        self._refreshed = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._vehicles)
+
+    # Fold in every row with an id above the last one indexed
+    def refresh(self):
+        with self._lock:
+            new_rows, params = self.watermark.where(get_pool().placeholder)
+            data = self._loader(VEHICLE_SQL.format(new_rows=new_rows), params)
+            added, changed = [], []
+            for row in data.itertuples(index=False):
+                plate = normalize_plate(row.vehicle_number)
+                if not plate:
+                    continue
+                counts = [int(row.stops), int(row.searches), int(row.arrests), int(row.drug_stops)]
+                last_seen = None if row.last_seen is None or row.last_seen != row.last_seen else str(row.last_seen)
+                entry = self._vehicles.get(plate)
+                changed.append(plate)
+                if entry is None:
+                    self._vehicles[plate] = counts + [last_seen]
+                    added.append(plate)
+                    continue
+                for position, count in enumerate(counts):
+                    entry[position] += count
+                if last_seen is not None and (entry[4] is None or last_seen > entry[4]):
+                    entry[4] = last_seen
+            # A handful of new plates are slotted in; a bulk load is sorted once
+            if len(added) > 100:
+                self._plates = sorted(self._vehicles)
+            else:
+                for plate in added:
+                    insort(self._plates, plate)
+            self._update_top(changed)
+            if len(data):
+                self.watermark.advance(data["last_id"].max())
+            self._refreshed = time.monotonic()
+
+    # Counters only grow, so a vehicle can only enter a top list by being in
+    # this refresh; the new list comes from the old one plus the changed plates
+    def _update_top(self, changed):
+        if not changed:
+            return
+        for position, counter in enumerate(COUNTERS):
+            candidates = set(self._top[counter]).union(changed)
+            self._top[counter] = heapq.nlargest(
+                TOP_SIZE, candidates, key=lambda plate: (self._vehicles[plate][position], plate))
+
+    def refresh_if_stale(self):
+        if time.monotonic() - self._refreshed >= self.refresh_seconds:
+            self.refresh()
+
+    def _record(self, plate, entry):
+        record = dict(zip(COUNTERS, entry[:4]), vehicle_number=plate, last_seen=entry[4])
+        record["flags"] = self._flags(plate, entry)
+        return record
+
+    def _flags(self, plate, entry):
+        flags = []
+        if plate in self.watch_list:
+            flags.append("watch list")
+        if entry is not None and entry[3]:
+            flags.append("drug related stop")
+        if entry is not None and entry[2]:
+            flags.append("arrest")
+        return flags
+
+    # Counters for one plate, or None if it has never been stopped
+    def lookup(self, plate):
+        plate = normalize_plate(plate)
+        entry = self._vehicles.get(plate)
+        if entry is None:
+            return None
+        return self._record(plate, entry)
+
+    # Plates starting with `prefix`, in plate order
+    def search(self, prefix, limit=SEARCH_LIMIT):
+        prefix = normalize_plate(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            start = bisect_left(self._plates, prefix)
+            plates = []
+            for plate in self._plates[start:start + limit]:
+                if not plate.startswith(prefix):
+                    break
+                plates.append(plate)
+        return [self._record(plate, self._vehicles[plate]) for plate in plates]
+
+    # Reasons to stop each plate: watch list membership or a record of
+    # arrests or drug related stops. Plates with nothing against them are left out.
+    def check(self, plates):
+        hits = {}
+        for plate in plates:
+            plate = normalize_plate(plate)
+            if not plate:
+                continue
+            flags = self._flags(plate, self._vehicles.get(plate))
+            if flags:
+                hits[plate] = flags
+        return hits
+
+    # The `n` (at most TOP_SIZE) vehicles with the highest count for one of COUNTERS
+    def top(self, counter, n=TOP_SIZE):
+        position = COUNTERS.index(counter)
+        plates = self._top[counter][:n]
+        return [self._record(plate, self._vehicles[plate]) for plate in plates
+                if self._vehicles[plate][position]]
+
+    def add_to_watch_list(self, plate):
+        plate = normalize_plate(plate)
+        if plate:
+            self.watch_list.add(plate)
+
+
+# Process-wide index, built on first use and kept current after that
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_vehicle_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VehicleIndex()
+            _index.refresh()
+        return _index
+
+
+@after_insert
+def _refresh_on_insert(records):
+    if _index is not None:
+        _index.refresh()
+
+
+def lookup_vehicle(plate):
+    index = get_vehicle_index()
+    index.refresh_if_stale()
+    return index.lookup(plate)
+
+
+def search_vehicles(prefix, limit=SEARCH_LIMIT):
+    index = get_vehicle_index()
+    index.refresh_if_stale()
+    return index.search(prefix, limit)
+
+
+def check_watch_list(plates):
+    index = get_vehicle_index()
+    index.refresh_if_stale()
+    return index.check(plates)